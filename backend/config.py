@@ -4,14 +4,16 @@ Loads environment variables and provides typed access to settings.
 """
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Literal
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
 
-class Settings(BaseSettings):
-    """Application settings loaded from environment variables."""
+class _EnvSettings(BaseSettings):
+    """Environment schema; only used once at startup to parse and validate."""
     
     # Project Paths
     PROJECT_ROOT: Path = Path(__file__).parent.parent
@@ -25,11 +27,17 @@ class Settings(BaseSettings):
     LLM_N_GPU_LAYERS: int = Field(-1, description="Number of GPU layers (-1 = all)")
     LLM_N_CTX: int = Field(2048, description="Context window size")
     LLM_TEMPERATURE: float = Field(0.7, ge=0.0, le=2.0)
+    LLM_PREFIX_CACHE_SIZE: int = Field(
+        0,
+        ge=0,
+        description="Prompt-prefix KV-cache snapshots kept per model (0 = off)"
+    )
     
     # Database Configuration
     NEO4J_URI: str = Field(..., description="Neo4j connection URI")
     NEO4J_USER: str = Field(..., description="Neo4j username")
     NEO4J_PASSWORD: str = Field(..., description="Neo4j password")
+    NEO4J_DATABASE: str = Field("neo4j", description="Neo4j database name")
     
     REDIS_HOST: str = Field("localhost", description="Redis host")
     REDIS_PORT: int = Field(6379, description="Redis port")
@@ -48,6 +56,11 @@ class Settings(BaseSettings):
         description="Sentence transformer model name"
     )
     EMBEDDING_DEVICE: Literal["cuda", "cpu"] = Field("cuda", description="Device for embeddings")
+    EMBEDDING_COMPILE: bool = Field(False, description="Compile the encoder with torch.compile")
+    GRAPH_VECTOR_SEARCH: bool = Field(
+        False,
+        description="Store fact embeddings on graph nodes and search Neo4j's vector index instead of ChromaDB"
+    )
     
     # Activity Monitor
     ACTIVITY_MONITOR_ENABLED: bool = Field(False, description="Enable system monitoring")
@@ -73,8 +86,79 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """
+    Validated, read-only application settings (plain slot attribute access).
+    
+    Mirrors _EnvSettings field for field; tests/test_config.py checks that
+    the two stay in sync.
+    """
+    
+    # Project Paths
+    PROJECT_ROOT: Path
+    DATA_DIR: Path
+    MODELS_DIR: Path
+    LOGS_DIR: Path
+    
+    # LLM Configuration
+    LLM_MODEL_PRIMARY: str
+    LLM_MODEL_SECONDARY: str
+    LLM_N_GPU_LAYERS: int
+    LLM_N_CTX: int
+    LLM_TEMPERATURE: float
+    LLM_PREFIX_CACHE_SIZE: int
+    
+    # Database Configuration
+    NEO4J_URI: str
+    NEO4J_USER: str
+    NEO4J_PASSWORD: str
+    NEO4J_DATABASE: str
+    
+    REDIS_HOST: str
+    REDIS_PORT: int
+    REDIS_DB: int
+    
+    CHROMA_PERSIST_DIRECTORY: str
+    
+    # API Configuration
+    API_HOST: str
+    API_PORT: int
+    WS_PORT: int
+    
+    # Embedding Configuration
+    EMBEDDING_MODEL: str
+    EMBEDDING_DEVICE: Literal["cuda", "cpu"]
+    EMBEDDING_COMPILE: bool
+    GRAPH_VECTOR_SEARCH: bool
+    
+    # Activity Monitor
+    ACTIVITY_MONITOR_ENABLED: bool
+    ACTIVITY_MONITOR_INTERVAL: int
+    
+    # RAG Configuration
+    RAG_SEARCH_PROVIDER: Literal["duckduckgo"]
+    RAG_MAX_RESULTS: int
+    RAG_REQUEST_TIMEOUT: int
+    
+    # Logging
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"]
+    LOG_FILE: str
+    
+    # Feature Flags
+    FEATURE_MODEL_SWITCHING: bool
+    FEATURE_STYLE_ADAPTATION: bool
+    FEATURE_ACTIVITY_MONITOR: bool
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse and validate the environment once, then return the frozen settings."""
+    return Settings(**_EnvSettings().model_dump())
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 # Create necessary directories
 settings.DATA_DIR.mkdir(exist_ok=True)
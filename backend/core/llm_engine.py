@@ -4,19 +4,84 @@ Handles model loading, inference, and GPU memory management.
 Integrated with unrestricted mode and memory system.
 """
 
+import hashlib
+import logging
 import os
+import threading
 import time
+from collections import OrderedDict
+from operator import itemgetter
 from typing import AsyncGenerator, Dict, Optional, List
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaState
+import ahocorasick
 import structlog
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from backend.config import settings
+from backend.core.prompt_assembler import PromptAssembler
 from backend.utils.exceptions import ModelLoadError, InferenceError
 
 logger = structlog.get_logger()
 
+# LOG_LEVEL as a number; unknown names fall back to INFO
+_SETTINGS_LOG_LEVEL = logging.getLevelName(str(settings.LOG_LEVEL).upper())
+if not isinstance(_SETTINGS_LOG_LEVEL, int):
+    _SETTINGS_LOG_LEVEL = logging.INFO
+
+
+def _log_enabled(level: int) -> bool:
+    """
+    Whether a record at level would be emitted, so metrics are not computed
+    for dropped records.
+    
+    Checked per call: once structlog is configured (setup_logging routes it
+    through stdlib logging) the stdlib logger's current level decides,
+    otherwise LOG_LEVEL does.
+    """
+    if structlog.is_configured():
+        return logging.getLogger(__name__).isEnabledFor(level)
+    return level >= _SETTINGS_LOG_LEVEL
+
+# Marks the end of a streamed generation on the token queue
+_STREAM_END = object()
+
+# C-level accessors for output['choices'][0]['text'] in llama.cpp completions
+_CHOICES = itemgetter('choices')
+_TEXT = itemgetter('text')
+
+# PromptAssembler is stateless, so one shared instance serves all requests
+_ASSEMBLER = PromptAssembler()
+
+# Complex reasoning keywords that need Mistral
+COMPLEX_KEYWORDS = (
+    "analyze", "compare", "evaluate", "explain in detail",
+    "comprehensive", "in-depth", "philosophical", "implications",
+    "reasoning", "technical details", "algorithm", "architecture"
+)
+
+# Aho-Corasick automaton: one C-level pass over the prompt for all keywords
+_COMPLEX_AC = ahocorasick.Automaton()
+for _kw in COMPLEX_KEYWORDS:
+    _COMPLEX_AC.add_word(_kw, _kw)
+_COMPLEX_AC.make_automaton()
+
+
+def _cheap_ctx_size(ctx: Dict, cap: int = 2000) -> int:
+    """
+    Estimate memory context size from the content that reaches the prompt.
+    
+    Stops counting once the estimate exceeds cap, since callers only
+    compare against a threshold.
+    """
+    size = 0
+    for key, max_items in (("memories", 5), ("graph_facts", 10)):
+        for item in (ctx.get(key) or [])[:max_items]:
+            size += len(item.get("content", ""))
+            if size > cap:
+                return size
+    return size
+
 
 class LLMEngine:
     """
@@ -26,15 +91,11 @@ class LLMEngine:
     
     def __init__(self):
         self.models: Dict[str, Llama] = {}
+        # Last selected model, for reporting only; generation takes an explicit key
         self.current_model: Optional[str] = None
-        self.executor = ThreadPoolExecutor(max_workers=2)
         
-        logger.info("Initializing Unrestricted LLM Engine")
-        self._load_models()
-    
-    def _load_models(self):
-        """Load both primary and secondary models into memory."""
-        model_configs = {
+        # Models are loaded on first use, not here
+        self._model_configs = {
             "phi3": {
                 "path": settings.LLM_MODEL_PRIMARY,
                 "name": "Phi-3.5-mini",
@@ -48,38 +109,88 @@ class LLMEngine:
                 "gpu_layers": -1
             }
         }
+        self._load_locks: Dict[str, asyncio.Lock] = {
+            key: asyncio.Lock() for key in self._model_configs
+        }
         
-        for key, config in model_configs.items():
-            try:
-                logger.info(f"Loading {config['name']}...", model=key)
-                
-                if not os.path.exists(config["path"]):
-                    raise ModelLoadError(f"Model file not found: {config['path']}")
-                
-                # Load model with optimized settings
-                model = Llama(
-                    model_path=config["path"],
-                    n_gpu_layers=config["gpu_layers"],
-                    n_ctx=config["ctx_size"],
-                    n_batch=512,
-                    n_threads=8,
-                    verbose=False,
-                    use_mlock=True,  # Keep in RAM
-                    use_mmap=True,   # Memory-mapped for efficiency
-                    rope_freq_scale=1.0,
-                    seed=-1  # Random seed
-                )
-                
+        # One dedicated worker thread per model: a Llama instance is not safe
+        # for concurrent calls, and all of its work stays on the same thread
+        self._executors: Dict[str, ThreadPoolExecutor] = {
+            key: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"llm-{key}")
+            for key in self._model_configs
+        }
+        
+        # Per-model LRU of prefix hash -> saved llama.cpp state. Every entry
+        # is a full copy of the prefix's KV cache (often hundreds of MB), so
+        # the size comes from LLM_PREFIX_CACHE_SIZE and defaults to off
+        self.prefix_cache_size = settings.LLM_PREFIX_CACHE_SIZE
+        self._state_cache: Dict[str, "OrderedDict[bytes, LlamaState]"] = {}
+        # Prefix hash currently at the start of each model's context
+        self._loaded_prefix: Dict[str, bytes] = {}
+        
+        logger.info("Initializing Unrestricted LLM Engine")
+    
+    def _load_model(self, key: str) -> Llama:
+        """Load a single model into memory (blocking)."""
+        config = self._model_configs[key]
+        
+        try:
+            logger.info(f"Loading {config['name']}...", model=key)
+            
+            if not os.path.exists(config["path"]):
+                raise ModelLoadError(f"Model file not found: {config['path']}")
+            
+            # Load model with optimized settings
+            model = Llama(
+                model_path=config["path"],
+                n_gpu_layers=config["gpu_layers"],
+                n_ctx=config["ctx_size"],
+                n_batch=512,
+                n_threads=8,
+                verbose=False,
+                use_mlock=True,  # Keep in RAM
+                use_mmap=True,   # Memory-mapped for efficiency
+                rope_freq_scale=1.0,
+                seed=-1  # Random seed
+            )
+            
+            logger.info(
+                f"Successfully loaded {config['name']}",
+                model=key,
+                context_size=config["ctx_size"]
+            )
+            
+            return model
+            
+        except Exception as e:
+            logger.error(f"Failed to load {config['name']}: {str(e)}")
+            raise ModelLoadError(f"Could not load model {key}: {str(e)}")
+    
+    async def _ensure_loaded(self, key: str) -> Llama:
+        """
+        Return the model for key, loading it on first use.
+        
+        Loading runs on the model's executor so the event loop keeps serving
+        other requests while weights are mapped and uploaded to the GPU.
+        """
+        model = self.models.get(key)
+        if model is not None:
+            return model
+        
+        async with self._load_locks[key]:
+            # Another request may have loaded it while we waited
+            model = self.models.get(key)
+            if model is None:
+                loop = asyncio.get_running_loop()
+                model = await loop.run_in_executor(self._executors[key], self._load_model, key)
                 self.models[key] = model
-                logger.info(
-                    f"Successfully loaded {config['name']}",
-                    model=key,
-                    context_size=config["ctx_size"]
-                )
-                
-            except Exception as e:
-                logger.error(f"Failed to load {config['name']}: {str(e)}")
-                raise ModelLoadError(f"Could not load model {key}: {str(e)}")
+        
+        return model
+    
+    async def preload(self, keys: Optional[List[str]] = None) -> None:
+        """Load models ahead of the first request (all models by default)."""
+        for key in keys or list(self._model_configs):
+            await self._ensure_loaded(key)
     
     def select_model(self, prompt: str, context: Dict) -> str:
         """
@@ -92,22 +203,14 @@ class LLMEngine:
         Returns:
             Model name: "phi3" or "mistral"
         """
-        # Complex reasoning keywords that need Mistral
-        complex_keywords = [
-            "analyze", "compare", "evaluate", "explain in detail",
-            "comprehensive", "in-depth", "philosophical", "implications",
-            "reasoning", "technical details", "algorithm", "architecture"
-        ]
-        
-        # Check prompt complexity
-        prompt_lower = prompt.lower()
-        word_count = len(prompt.split())
+        # Check prompt complexity (approximate word count, no list allocation)
+        word_count = prompt.count(" ") + 1
         
         # Check for complex keywords
-        has_complex = any(kw in prompt_lower for kw in complex_keywords)
+        has_complex = next(_COMPLEX_AC.iter(prompt.lower()), None) is not None
         
-        # Check context size (serialize to estimate)
-        context_size = len(str(context)) if context else 0
+        # Check context size (structural estimate, no serialization)
+        context_size = _cheap_ctx_size(context) if context else 0
         
         # Decision logic
         if word_count > 150 or has_complex or context_size > 2000:
@@ -122,92 +225,164 @@ class LLMEngine:
         logger.debug("Selecting Phi-3 for quick response")
         return "phi3"
     
+    def _restore_prefix(self, model_key: str, model: Llama, prefix: Optional[str]) -> None:
+        """
+        Make sure the model context starts with the evaluated prompt prefix.
+        
+        llama.cpp skips re-evaluating prompt tokens that already match its
+        context, so once the prefix state is in place only the per-request
+        suffix is prefilled. That already happens without snapshots when the
+        same prefix repeats; the snapshot cache (LLM_PREFIX_CACHE_SIZE) adds
+        reuse across alternating prefixes at the cost of one KV-cache copy
+        per entry. Must run on the thread that uses the model.
+        
+        Args:
+            model_key: Model name ("phi3" or "mistral")
+            model: Loaded model
+            prefix: Static prompt prefix (system prompt + rules), if any
+        """
+        if not prefix or self.prefix_cache_size <= 0:
+            # Context is about to be overwritten by an uncached prompt
+            self._loaded_prefix.pop(model_key, None)
+            return
+        
+        key = hashlib.blake2b(prefix.encode("utf-8"), digest_size=16).digest()
+        
+        # Last generation on this model already started with this prefix
+        if self._loaded_prefix.get(model_key) == key:
+            return
+        
+        cache = self._state_cache.setdefault(model_key, OrderedDict())
+        state = cache.get(key)
+        
+        if state is not None:
+            cache.move_to_end(key)
+            model.load_state(state)
+        else:
+            model.reset()
+            model.eval(model.tokenize(prefix.encode("utf-8")))
+            cache[key] = model.save_state()
+            if len(cache) > self.prefix_cache_size:
+                cache.popitem(last=False)
+        
+        self._loaded_prefix[model_key] = key
+    
     async def generate(
         self,
+        model_key: str,
         prompt: str,
         max_tokens: int = 512,
         temperature: float = 0.7,
         stream: bool = True,
-        stop_sequences: Optional[List[str]] = None
+        stop_sequences: Optional[List[str]] = None,
+        cache_prefix: Optional[str] = None
     ) -> AsyncGenerator[str, None]:
         """
         Generate response from LLM with streaming support.
         
         Args:
+            model_key: Model to use ("phi3" or "mistral")
             prompt: Complete prompt with context
             max_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             stream: Whether to stream tokens
             stop_sequences: Optional stop sequences
+            cache_prefix: Leading part of prompt whose KV-cache can be reused
             
         Yields:
             Generated text tokens (if stream=True)
         """
         try:
-            # Get the current model
-            if not self.current_model or self.current_model not in self.models:
-                raise InferenceError("No model selected or loaded")
+            # Get the requested model
+            if model_key not in self._model_configs:
+                raise InferenceError(f"Unknown model: {model_key}")
             
-            model = self.models[self.current_model]
+            model = await self._ensure_loaded(model_key)
             
             # Default stop sequences for conversation
             if stop_sequences is None:
                 stop_sequences = ["User:", "Human:", "\n\n\n"]
             
             # Start generation timing
-            start_time = time.time()
-            first_token_time = None
+            start_ns = time.perf_counter_ns()
             token_count = 0
             
             if stream:
-                # Streaming generation in thread pool
-                loop = asyncio.get_event_loop()
+                # Streaming generation in thread pool; tokens are handed back
+                # to the event loop through a queue so it never blocks on llama.cpp
+                loop = asyncio.get_running_loop()
+                token_queue: asyncio.Queue = asyncio.Queue()
+                cancelled = threading.Event()
                 
-                # Create generator function for thread
-                def generate_tokens():
-                    return model(
-                        prompt,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        stop=stop_sequences,
-                        stream=True,
-                        echo=False,
-                        top_p=0.95,
-                        repeat_penalty=1.1
-                    )
+                def produce_tokens():
+                    # Queue ends with _STREAM_END, or the exception that stopped it
+                    end = _STREAM_END
+                    try:
+                        self._restore_prefix(model_key, model, cache_prefix)
+                        
+                        for output in model(
+                            prompt,
+                            max_tokens=max_tokens,
+                            temperature=temperature,
+                            stop=stop_sequences,
+                            stream=True,
+                            echo=False,
+                            top_p=0.95,
+                            repeat_penalty=1.1
+                        ):
+                            if cancelled.is_set():
+                                break
+                            loop.call_soon_threadsafe(
+                                token_queue.put_nowait, _TEXT(_CHOICES(output)[0])
+                            )
+                    except Exception as e:
+                        end = e
+                    finally:
+                        loop.call_soon_threadsafe(token_queue.put_nowait, end)
                 
-                # Run in thread pool
-                generator = await loop.run_in_executor(
-                    self.executor,
-                    generate_tokens
-                )
+                self._executors[model_key].submit(produce_tokens)
                 
-                # Stream tokens
-                for output in generator:
-                    if first_token_time is None:
-                        first_token_time = time.time()
-                        ttft = first_token_time - start_time
-                        logger.debug(f"Time to first token: {ttft:.2f}s")
+                # Stream tokens; the first one is peeled off for TTFT so the
+                # per-token loop carries no timing branch
+                try:
+                    token = await token_queue.get()
+                    if type(token) is str:
+                        if _log_enabled(logging.DEBUG):
+                            logger.debug(
+                                "Time to first token",
+                                ttft_ms=(time.perf_counter_ns() - start_ns) // 1_000_000
+                            )
+                        token_count = 1
+                        yield token
+                        
+                        while type(token := await token_queue.get()) is str:
+                            token_count += 1
+                            yield token
                     
-                    token = output['choices'][0]['text']
-                    token_count += 1
-                    yield token
+                    if token is not _STREAM_END:
+                        raise token
+                finally:
+                    # Stop the producer if the consumer goes away early
+                    cancelled.set()
                 
                 # Log performance
-                total_time = time.time() - start_time
-                logger.info(
-                    "Generation complete",
-                    model=self.current_model,
-                    tokens=token_count,
-                    total_time_s=round(total_time, 2),
-                    tokens_per_sec=round(token_count / total_time, 1)
-                )
+                if _log_enabled(logging.INFO):
+                    total_ns = max(1, time.perf_counter_ns() - start_ns)
+                    logger.info(
+                        "Generation complete",
+                        model=model_key,
+                        tokens=token_count,
+                        total_time_ms=total_ns // 1_000_000,
+                        tokens_per_sec=token_count * 1_000_000_000 // total_ns
+                    )
             
             else:
                 # Non-streaming generation
-                loop = asyncio.get_event_loop()
+                loop = asyncio.get_running_loop()
                 
                 def generate_complete():
+                    self._restore_prefix(model_key, model, cache_prefix)
+                    
                     return model(
                         prompt,
                         max_tokens=max_tokens,
@@ -220,19 +395,18 @@ class LLMEngine:
                     )
                 
                 output = await loop.run_in_executor(
-                    self.executor,
+                    self._executors[model_key],
                     generate_complete
                 )
                 
-                response = output['choices'][0]['text']
-                total_time = time.time() - start_time
-                
-                logger.info(
-                    "Generation complete (non-streaming)",
-                    model=self.current_model,
-                    response_length=len(response),
-                    total_time_s=round(total_time, 2)
-                )
+                response = _TEXT(_CHOICES(output)[0])
+                if _log_enabled(logging.INFO):
+                    logger.info(
+                        "Generation complete (non-streaming)",
+                        model=model_key,
+                        response_length=len(response),
+                        total_time_ms=(time.perf_counter_ns() - start_ns) // 1_000_000
+                    )
                 
                 yield response
         
@@ -254,49 +428,51 @@ class LLMEngine:
         This is the main method for conversation generation.
         """
         # Select model based on complexity
-        self.current_model = self.select_model(user_message, memory_context)
-        
-        # Import prompt assembler
-        from backend.core.prompt_assembler import PromptAssembler
+        model_key = self.select_model(user_message, memory_context)
+        self.current_model = model_key
         
-        # Assemble prompt with context
-        assembler = PromptAssembler()
-        full_prompt = assembler.assemble_unrestricted_prompt(
+        # Assemble prompt with context; the prefix only changes with the rules
+        prefix, suffix = _ASSEMBLER.assemble_unrestricted_prompt_parts(
             user_message=user_message,
             memory_context=memory_context,
             user_rules=user_rules
         )
+        full_prompt = prefix + suffix
         
         # Log prompt info
         logger.debug(
             "Prompt assembled",
             prompt_length=len(full_prompt),
-            model=self.current_model,
+            model=model_key,
             has_memory=bool(memory_context.get('memories')),
             num_rules=len(user_rules)
         )
         
         # Generate response
         async for token in self.generate(
+            model_key=model_key,
             prompt=full_prompt,
             max_tokens=max_tokens,
-            stream=stream
+            stream=stream,
+            cache_prefix=prefix
         ):
             yield token
     
     def get_model_info(self) -> Dict:
         """Get information about loaded models."""
         info = {}
-        for name, model in self.models.items():
+        for name, config in self._model_configs.items():
+            model = self.models.get(name)
             info[name] = {
-                "loaded": True,
+                "loaded": model is not None,
                 "current": name == self.current_model,
-                "context_size": model.n_ctx()
+                "context_size": model.n_ctx() if model is not None else config["ctx_size"]
             }
         return info
     
     def __del__(self):
-        """Cleanup models and thread pool."""
-        self.executor.shutdown(wait=False)
+        """Cleanup models and thread pools."""
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
         for model_name in list(self.models.keys()):
             del self.models[model_name]
\ No newline at end of file
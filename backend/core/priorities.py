@@ -0,0 +1,11 @@
+"""
+Rule Priorities
+Priority tables shared by the rule system (memory) and prompt assembly (core).
+"""
+
+# Prompt ordering rank per priority (lower = listed first); stored on each
+# rule dict as "_prio" when it is loaded so consumers can sort without lookups
+PRIORITY_RANK = {"critical": 0, "high": 1, "normal": 2, "low": 3}
+
+# Priority hierarchy used by get_active_rules' min_priority filter
+PRIORITY_LEVEL = {"critical": 4, "high": 3, "normal": 2, "low": 1}
@@ -3,15 +3,186 @@ Embedding Generator for NIRE
 Converts text to vector embeddings for semantic search.
 """
 
-from typing import List, Union
-from sentence_transformers import SentenceTransformer
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Tuple, Union
+import numpy as np
 import structlog
-import torch
 
 from backend.config import settings
 
+# torch and sentence_transformers take ~1.5 s to import; they are loaded
+# on first model use so processes that never embed don't pay for them.
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 logger = structlog.get_logger()
 
+Precision = Literal["fp32", "fp16", "int8"]
+
+# Max texts whose token ids are kept by the tokenization cache
+TOKEN_CACHE_SIZE = 10_000
+
+
+def _apply_precision(embeddings: np.ndarray, precision: Precision, normalize: bool) -> np.ndarray:
+    """
+    Reduce float32 embeddings to the requested storage precision.
+    
+    int8 uses a fixed scale of 127: normalized embeddings have every
+    component in [-1, 1], so no per-vector scale needs to be stored and
+    cosine ranking is preserved up to rounding.
+    """
+    if precision == "fp32":
+        # A half-precision GPU model yields fp16; keep the fp32 contract
+        return embeddings.astype(np.float32, copy=False)
+    if precision == "fp16":
+        return embeddings.astype(np.float16)
+    if precision == "int8":
+        if not normalize:
+            raise ValueError("int8 precision requires normalized embeddings")
+        return np.rint(embeddings * 127).astype(np.int8)
+    raise ValueError(f"Unknown precision: {precision}")
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize rows to int8 with a per-row scale.
+    
+    Each row is scaled by 127 / max(|v|), so its largest component uses
+    the full int8 range regardless of normalization. The row is recovered
+    as codes / scale.
+    
+    Returns:
+        (codes int8 [n, d], scales float32 [n])
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    peak = np.abs(embeddings).max(axis=1)
+    # All-zero rows get scale 1 so they round-trip as zeros
+    scales = (127.0 / np.where(peak > 0, peak, 127.0)).astype(np.float32)
+    codes = np.rint(embeddings * scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Inverse of quantize_int8 (up to rounding), as float32 rows."""
+    return codes.astype(np.float32) / np.asarray(scales, dtype=np.float32)[:, None]
+
+
+def _cancel_pending(items: List[Tuple[List[str], bool, asyncio.Future]]) -> None:
+    """Cancel the futures of batching requests that will not be served."""
+    for _, _, future in items:
+        if not future.done():
+            future.cancel()
+
+
+def _cache_tokenization(transformer, maxsize: int = TOKEN_CACHE_SIZE) -> None:
+    """
+    Memoize per-text tokenization on the model's Transformer module.
+    
+    SentenceTransformer.encode re-tokenizes every batch. This keeps each
+    text's unpadded token ids in an LRU and pads batches from it, so
+    repeated texts skip the tokenizer. Paired inputs and left-padding
+    tokenizers keep the original method.
+    """
+    import torch
+    
+    tokenizer = transformer.tokenizer
+    if tokenizer.padding_side != "right":
+        return
+    
+    original = transformer.tokenize
+    pad_id = tokenizer.pad_token_id
+    cache: OrderedDict[str, Dict[str, List[int]]] = OrderedDict()
+    lock = threading.Lock()
+    
+    def tokenize(texts):
+        if not texts or not isinstance(texts[0], str):
+            return original(texts)
+        
+        rows: List[Optional[Dict[str, List[int]]]] = [None] * len(texts)
+        with lock:
+            for i, text in enumerate(texts):
+                row = cache.get(text)
+                if row is not None:
+                    cache.move_to_end(text)
+                    rows[i] = row
+        
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            # Same preprocessing and truncation as Transformer.tokenize
+            prepared = [str(texts[i]).strip() for i in missing]
+            if transformer.do_lower_case:
+                prepared = [s.lower() for s in prepared]
+            encoded = tokenizer(
+                prepared,
+                padding=False,
+                truncation="longest_first",
+                max_length=transformer.max_seq_length
+            )
+            keys = list(encoded.keys())
+            with lock:
+                for j, i in enumerate(missing):
+                    row = {key: encoded[key][j] for key in keys}
+                    rows[i] = row
+                    cache[texts[i]] = row
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+        
+        # Right-pad to the longest row; only input_ids use the pad token
+        width = max(len(row["input_ids"]) for row in rows)
+        return {
+            key: torch.tensor([
+                row[key] + [pad_id if key == "input_ids" else 0] * (width - len(row[key]))
+                for row in rows
+            ])
+            for key in rows[0]
+        }
+    
+    transformer.tokenize = tokenize
+
+
+@lru_cache(maxsize=1)
+def load_shared_model() -> "SentenceTransformer":
+    """
+    Load and prepare the embedding model once per process.
+    
+    Every EmbeddingGenerator shares this instance. Call it in the parent
+    process before forking workers so they inherit the loaded pages
+    copy-on-write instead of each loading the weights again.
+    """
+    from sentence_transformers import SentenceTransformer
+    import torch
+    
+    logger.info(
+        "Loading embedding model",
+        model=settings.EMBEDDING_MODEL,
+        device=settings.EMBEDDING_DEVICE
+    )
+    
+    model = SentenceTransformer(
+        settings.EMBEDDING_MODEL,
+        device=settings.EMBEDDING_DEVICE
+    )
+    model.eval()
+    
+    # Half precision on GPU (tensor cores); CPU stays fp32
+    if settings.EMBEDDING_DEVICE == "cuda":
+        model.half()
+    
+    # Second tier under the embedding LRU: misses still skip re-tokenizing
+    _cache_tokenization(model[0])
+    
+    # Fuse the transformer forward pass; the first encode pays the compile cost.
+    # Compiled in place on the inner HF model so SentenceTransformer.encode uses it.
+    if settings.EMBEDDING_COMPILE:
+        transformer = model[0]
+        transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+    
+    return model
+
 
 class EmbeddingGenerator:
     """
@@ -20,40 +191,231 @@ class EmbeddingGenerator:
     Uses all-MiniLM-L6-v2 for balance of speed and quality.
     """
     
-    def __init__(self):
-        """Initialize embedding model."""
-        logger.info(
-            "Loading embedding model",
-            model=settings.EMBEDDING_MODEL,
-            device=settings.EMBEDDING_DEVICE
-        )
+    def __init__(
+        self,
+        cache_size: int = 10_000,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Initialize embedding model.
         
-        # Load model
-        self.model = SentenceTransformer(
-            settings.EMBEDDING_MODEL,
-            device=settings.EMBEDDING_DEVICE
-        )
+        Args:
+            cache_size: Max texts kept in the encode() LRU cache (0 disables it)
+            max_batch: Max texts coalesced into one model call by encode()
+            max_wait_ms: How long encode() waits for other callers to join a batch
+        """
+        # Load model (shared by every generator in the process)
+        self.model = load_shared_model()
         
         # Get embedding dimension
         self.dimension = self.model.get_sentence_embedding_dimension()
         
+        # LRU of text hash -> embedding row; encode() runs on worker threads
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        # Micro-batching: concurrent encode() calls share one model call.
+        # The worker is started lazily, on the loop of the first caller,
+        # and stopped by aclose().
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker: Optional[asyncio.Task] = None
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        
         logger.info(
             "Embedding model loaded",
             dimension=self.dimension,
             device=settings.EMBEDDING_DEVICE
         )
     
+    def _encode_blocking(self, texts: List[str], **kwargs) -> np.ndarray:
+        """Run the model without autograd bookkeeping (called from a worker thread)."""
+        import torch
+        
+        with torch.inference_mode():
+            return self.model.encode(texts, **kwargs)
+    
+    @staticmethod
+    def _cache_key(text: str, normalize: bool) -> bytes:
+        """Fixed-size key for a text; normalized and raw embeddings differ."""
+        digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        return digest + (b"\x01" if normalize else b"\x00")
+    
+    async def _submit(self, texts: List[str], normalize: bool) -> np.ndarray:
+        """Queue texts for the batching worker and wait for their rows."""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop or self._batch_worker.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = loop.create_task(self._batch_worker_loop())
+            self._batch_loop = loop
+        
+        future = loop.create_future()
+        self._batch_queue.put_nowait((texts, bool(normalize), future))
+        return await future
+    
+    async def _drain(self) -> List[Tuple[List[str], bool, asyncio.Future]]:
+        """Wait for one request, then gather more until max_batch or max_wait_ms."""
+        queue = self._batch_queue
+        loop = asyncio.get_running_loop()
+        
+        items = [await queue.get()]
+        count = len(items[0][0])
+        deadline = loop.time() + self.max_wait_ms / 1000
+        
+        try:
+            while count < self.max_batch:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                items.append(item)
+                count += len(item[0])
+        except asyncio.CancelledError:
+            # Worker stopped mid-gather: release the callers already dequeued
+            _cancel_pending(items)
+            raise
+        
+        return items
+    
+    async def _batch_worker_loop(self):
+        """Run coalesced requests through the model, one call per normalize flag."""
+        items = []
+        try:
+            while True:
+                items = await self._drain()
+                
+                for normalize in (True, False):
+                    group = [item for item in items if item[1] is normalize]
+                    if not group:
+                        continue
+                    
+                    texts = [text for item in group for text in item[0]]
+                    try:
+                        embeddings = await asyncio.to_thread(
+                            self._encode_blocking,
+                            texts,
+                            normalize_embeddings=normalize,
+                            convert_to_numpy=True,
+                            show_progress_bar=False
+                        )
+                    except Exception as e:
+                        for _, _, future in group:
+                            if not future.done():
+                                future.set_exception(e)
+                        continue
+                    
+                    offset = 0
+                    for item_texts, _, future in group:
+                        end = offset + len(item_texts)
+                        if not future.done():
+                            future.set_result(embeddings[offset:end])
+                        offset = end
+                    
+                    if len(group) > 1:
+                        logger.debug(
+                            "Embedding requests coalesced",
+                            requests=len(group),
+                            count=len(texts)
+                        )
+        finally:
+            # Cancelled mid-batch (aclose): don't leave callers waiting
+            _cancel_pending(items)
+    
+    async def aclose(self) -> None:
+        """
+        Stop the micro-batching worker and cancel requests still queued.
+        
+        Call before the worker's event loop closes, otherwise asyncio
+        reports the pending task as destroyed. The generator stays usable:
+        the next encode() starts a new worker.
+        """
+        worker, queue = self._batch_worker, self._batch_queue
+        self._batch_worker = self._batch_queue = self._batch_loop = None
+        
+        if worker is not None and not worker.done():
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        
+        if queue is not None:
+            while not queue.empty():
+                _cancel_pending([queue.get_nowait()])
+    
+    async def _encode_cached(self, texts: List[str], normalize: bool) -> np.ndarray:
+        """
+        Encode texts, running the model only on those not in the LRU cache.
+        
+        Rows come back in input order, in the model's output dtype.
+        """
+        if not self.cache_size or not texts:
+            return await self._submit(texts, normalize)
+        
+        keys = [self._cache_key(t, normalize) for t in texts]
+        rows: List[Union[np.ndarray, None]] = [None] * len(texts)
+        
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                row = self._cache.get(key)
+                if row is not None:
+                    self._cache.move_to_end(key)
+                    rows[i] = row
+        
+        missing = [i for i, row in enumerate(rows) if row is None]
+        with self._cache_lock:
+            self._cache_hits += len(texts) - len(missing)
+            self._cache_misses += len(missing)
+        if missing:
+            fresh = await self._submit([texts[i] for i in missing], normalize)
+            with self._cache_lock:
+                for i, row in zip(missing, fresh):
+                    # Copy so a cached row doesn't pin the whole batch array
+                    row = row.copy()
+                    row.flags.writeable = False
+                    rows[i] = row
+                    self._cache[keys[i]] = row
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        logger.debug(
+            "Embedding cache lookup",
+            hits=len(texts) - len(missing),
+            misses=len(missing)
+        )
+        
+        return np.stack(rows)
+    
     async def encode(
         self,
         text: Union[str, List[str]],
-        normalize: bool = True
-    ) -> Union[List[float], List[List[float]]]:
+        normalize: bool = True,
+        return_numpy: bool = False,
+        precision: Precision = "fp32"
+    ) -> Union[List[float], List[List[float]], np.ndarray]:
         """
         Generate embedding(s) for text.
         
         Args:
             text: Single text or list of texts
             normalize: Whether to normalize embeddings
+            return_numpy: Return the float32 ndarray as-is instead of
+                converting to Python lists (ChromaDB 0.4 requires lists)
+            precision: "fp32", "fp16" (half size) or "int8" (quarter size)
             
         Returns:
             Single embedding or list of embeddings
@@ -65,16 +427,13 @@ class EmbeddingGenerator:
             text = [text]
         
         try:
-            # Generate embeddings
-            embeddings = self.model.encode(
-                text,
-                normalize_embeddings=normalize,
-                convert_to_tensor=False,
-                show_progress_bar=False
-            )
+            # Cached rows are reused; misses are batched with concurrent callers
+            embeddings = await self._encode_cached(text, normalize)
+            embeddings = _apply_precision(embeddings, precision, normalize)
             
-            # Convert to list
-            embeddings = embeddings.tolist()
+            # Convert to list only for consumers that need it
+            if not return_numpy:
+                embeddings = embeddings.tolist()
             
             logger.debug(
                 "Embeddings generated",
@@ -100,34 +459,58 @@ class EmbeddingGenerator:
         self,
         texts: List[str],
         batch_size: int = 32,
-        normalize: bool = True
-    ) -> List[List[float]]:
+        normalize: bool = True,
+        return_numpy: bool = False,
+        precision: Precision = "fp32"
+    ) -> Union[List[List[float]], np.ndarray]:
         """
         Generate embeddings in batches (more efficient for many texts).
         
+        Texts are not pre-sorted here: SentenceTransformer.encode already
+        orders inputs by length before batching (so each batch pads to
+        similar lengths) and restores the input order afterwards.
+        Duplicate texts are encoded once and fanned back out.
+        
+        Bulk ingestion path: this bypasses the encode() LRU cache and
+        micro-batcher (one-off texts would only evict hot query rows), so
+        its texts are not counted in get_cache_stats().
+        
         Args:
             texts: List of texts
             batch_size: Batch size for processing
             normalize: Whether to normalize embeddings
+            return_numpy: Return the float32 ndarray instead of Python lists
+            precision: "fp32", "fp16" (half size) or "int8" (quarter size)
             
         Returns:
             List of embeddings
         """
         
         try:
-            embeddings = self.model.encode(
-                texts,
+            # First-occurrence order, so the common no-duplicates case needs no gather
+            unique = list(dict.fromkeys(texts))
+            
+            embeddings = await asyncio.to_thread(
+                self._encode_blocking,
+                unique,
                 batch_size=batch_size,
                 normalize_embeddings=normalize,
-                convert_to_tensor=False,
-                show_progress_bar=len(texts) > 100
+                convert_to_numpy=True,
+                show_progress_bar=len(unique) > 100
             )
+            embeddings = _apply_precision(embeddings, precision, normalize)
             
-            embeddings = embeddings.tolist()
+            if len(unique) < len(texts):
+                position = {text: i for i, text in enumerate(unique)}
+                embeddings = embeddings[[position[text] for text in texts]]
+            
+            if not return_numpy:
+                embeddings = embeddings.tolist()
             
             logger.info(
                 "Batch embeddings generated",
                 count=len(embeddings),
+                unique=len(unique),
                 batch_size=batch_size
             )
             
@@ -141,10 +524,53 @@ class EmbeddingGenerator:
             )
             raise
     
+    async def encode_quantized(
+        self,
+        text: Union[str, List[str]],
+        normalize: bool = True
+    ) -> Tuple[np.ndarray, Union[float, np.ndarray]]:
+        """
+        Generate int8 embedding(s) with per-vector scales (quarter size).
+        
+        Unlike precision="int8", the scale adapts to each vector, so
+        unnormalized embeddings are supported; store the scale next to
+        the codes (e.g. in metadata) to dequantize with dequantize_int8.
+        
+        Args:
+            text: Single text or list of texts
+            normalize: Whether to normalize embeddings
+            
+        Returns:
+            (codes, scale) for a single text, (codes [n, d], scales [n]) for a list
+        """
+        
+        is_single = isinstance(text, str)
+        texts = [text] if is_single else text
+        
+        embeddings = await self._encode_cached(texts, normalize)
+        codes, scales = quantize_int8(embeddings)
+        
+        if is_single:
+            return codes[0], float(scales[0])
+        
+        return codes, scales
+    
     def get_dimension(self) -> int:
         """Return embedding dimension."""
         return self.dimension
     
+    def get_cache_stats(self) -> dict:
+        """Return embedding cache size and hit/miss counters (encode() and encode_quantized() only)."""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._cache),
+                "capacity": self.cache_size,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / lookups if lookups else 0.0
+            }
+    
     def get_model_info(self) -> dict:
         """Return model information."""
         return {
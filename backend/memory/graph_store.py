@@ -5,13 +5,220 @@ Handles knowledge graph operations using Neo4j.
 
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
-from neo4j import GraphDatabase
+from functools import lru_cache
+import asyncio
+import itertools
+import os
+import re
+import threading
+from neo4j import AsyncDriver, AsyncGraphDatabase, AsyncSession
+import ahocorasick
 import structlog
-import uuid
-import json
+
+from backend.config import settings
+from backend.utils.cache import LRUKCache, TTLCache
 
 logger = structlog.get_logger()
 
+# Sentinel distinguishing a cached "not found" from a cache miss
+_MISS = object()
+
+# (positive, negative) keyword pairs used by detect_contradictions
+NEGATION_PAIRS = (
+    ("like", "dislike"),
+    ("love", "hate"),
+    ("prefer", "avoid"),
+    ("yes", "no"),
+    ("true", "false")
+)
+
+# Maps each keyword to the opposite words that contradict it; one pass
+# over a text finds every keyword occurrence (overlaps included, like `in`)
+_OPPOSITES: Dict[str, List[str]] = {}
+for _pos, _neg in NEGATION_PAIRS:
+    _OPPOSITES.setdefault(_pos, []).append(_neg)
+    _OPPOSITES.setdefault(_neg, []).append(_pos)
+_NEGATION_AC = ahocorasick.Automaton()
+for _word, _opposite in _OPPOSITES.items():
+    _NEGATION_AC.add_word(_word, tuple(_opposite))
+_NEGATION_AC.make_automaton()
+
+
+# Relationship types are spliced into Cypher (5.15 can't parameterize
+# them), so only plain upper-snake identifiers are accepted
+_REL_TYPE_RE = re.compile(r"[A-Z][A-Z0-9_]*")
+
+
+def _check_rel_type(relationship_type: str) -> str:
+    """Reject relationship types that aren't plain identifiers."""
+    if not _REL_TYPE_RE.fullmatch(relationship_type):
+        raise ValueError(f"Invalid relationship type: {relationship_type!r}")
+    return relationship_type
+
+
+@lru_cache(maxsize=64)
+def _link_entities_query(relationship_type: str) -> str:
+    """One byte-identical statement per type, so the server reuses its plan."""
+    return f"""
+                MATCH (e1:Entity {{name: $entity1}})
+                MATCH (e2:Entity {{name: $entity2}})
+                MERGE (e1)-[r:{_check_rel_type(relationship_type)}]->(e2)
+                ON CREATE SET r.created_at = datetime()
+                SET r += $properties
+                RETURN id(r) as rel_id
+            """
+
+
+@lru_cache(maxsize=64)
+def _link_fact_query(relationship_type: str) -> str:
+    """Fact-to-entity counterpart of _link_entities_query."""
+    return f"""
+                MATCH (f:Fact {{id: $fact_id}})
+                MATCH (e:Entity {{name: $entity_name}})
+                MERGE (f)-[r:{_check_rel_type(relationship_type)}]->(e)
+                RETURN id(r) as rel_id
+            """
+
+
+_CREATE_FACT = """
+                MATCH (u:User {id: $user_id})
+                CREATE (f:Fact {
+                    id: $fact_id,
+                    content: $content,
+                    category: $category,
+                    confidence: $confidence,
+                    source: $source,
+                    created_at: datetime(),
+                    updated_at: datetime(),
+                    deprecated: false,
+                    embedding: $embedding
+                })
+                CREATE (u)-[:KNOWS {certainty: $confidence, learned_at: datetime()}]->(f)
+            """
+
+_CREATE_FACT_NO_CTX = _CREATE_FACT + " RETURN f.id as fact_id"
+
+# Also links the fact to its context
+_CREATE_FACT_WITH_CTX = _CREATE_FACT + """
+                WITH f
+                MATCH (ctx:Context {id: $context})
+                CREATE (f)-[:OCCURRED_IN]->(ctx)
+                """ + " RETURN f.id as fact_id"
+
+
+def _build_get_facts_query(has_category: bool, has_context: bool, has_cursor: bool) -> str:
+    """Assemble one get_facts variant (called only at import)."""
+    query = """
+                MATCH (u:User {id: $user_id})-[:KNOWS]->(f:Fact)
+                WHERE f.deprecated = false
+                  AND f.confidence >= $min_confidence
+            """
+    
+    if has_category:
+        query += " AND f.category = $category"
+    
+    if has_cursor:
+        # Seek instead of skip: the updated_at index serves the range
+        query += " AND f.updated_at < $cursor"
+    
+    if has_context:
+        query += """
+                    WITH f
+                    MATCH (f)-[:OCCURRED_IN]->(ctx:Context {id: $context})
+                """
+    
+    query += """
+                RETURN f.id AS id,
+                       f.content AS content,
+                       f.category AS category,
+                       f.confidence AS confidence,
+                       f.source AS source,
+                       f.created_at AS created_at,
+                       f.updated_at AS updated_at
+                ORDER BY f.updated_at DESC
+                LIMIT $limit
+            """
+    return query
+
+
+# Every filter combination precomputed, so each variant is byte-identical
+# across calls and stays warm in the server's plan cache.
+# Keyed by (has_category, has_context, has_cursor).
+_GET_FACTS = {
+    flags: _build_get_facts_query(*flags)
+    for flags in itertools.product((False, True), repeat=3)
+}
+
+
+# Indexes backing GraphStore's lookups:
+#   entity_name       - MATCH/MERGE (e:Entity {name: ...}) everywhere
+#   preference_key    - MERGE (p:Preference {key: ...}) in create_preference
+#   fact_active_order - get_facts filter (deprecated, confidence) + updated_at order
+#   fact_updated_at   - ORDER BY / range on f.updated_at alone
+GRAPH_INDEXES = (
+    "CREATE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)",
+    "CREATE INDEX preference_key IF NOT EXISTS FOR (p:Preference) ON (p.key)",
+    "CREATE INDEX fact_active_order IF NOT EXISTS "
+    "FOR (f:Fact) ON (f.deprecated, f.confidence, f.updated_at)",
+    "CREATE INDEX fact_updated_at IF NOT EXISTS FOR (f:Fact) ON (f.updated_at)",
+)
+
+
+# Vector index over :Fact(embedding), used by search_similar_facts
+FACT_EMBEDDING_INDEX = "fact_embedding"
+
+
+def make_driver(
+    max_connection_pool_size: int = 100,
+    connection_acquisition_timeout: float = 60.0,
+    max_connection_lifetime: float = 3600.0
+) -> AsyncDriver:
+    """
+    Create the async Neo4j driver GraphStore runs on, from settings.
+    
+    Bolt connections are pooled and reused across sessions; the pool is
+    sized for concurrent requests so queries don't queue for a connection.
+    """
+    return AsyncGraphDatabase.driver(
+        settings.NEO4J_URI,
+        auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+        max_connection_pool_size=max_connection_pool_size,
+        connection_acquisition_timeout=connection_acquisition_timeout,
+        max_connection_lifetime=max_connection_lifetime,
+        keep_alive=True
+    )
+
+
+async def warm_up_driver(
+    driver: AsyncDriver,
+    connections: int = 8,
+    database: Optional[str] = None
+) -> None:
+    """
+    Verify connectivity and open pool connections ahead of the first request.
+    
+    Sessions run concurrently so each holds its own connection; run
+    sequentially they would all reuse one.
+    """
+    database = database or settings.NEO4J_DATABASE
+    await driver.verify_connectivity()
+    
+    async def ping():
+        async with driver.session(database=database) as session:
+            result = await session.run("RETURN 1")
+            await result.consume()
+    
+    await asyncio.gather(*(ping() for _ in range(connections)))
+    
+    info = await driver.get_server_info()
+    logger.info(
+        "Neo4j driver warmed up",
+        address=str(info.address),
+        agent=info.agent,
+        protocol_version=".".join(map(str, info.protocol_version)),
+        connections=connections
+    )
+
 
 class GraphStore:
     """
@@ -24,15 +231,82 @@ class GraphStore:
     - Conflict resolution
     """
     
-    def __init__(self, driver):
+    # Read caches: entries live this long unless a write invalidates them
+    CACHE_TTL = 60.0
+    CACHE_SIZE = 10_000
+    
+    # Per-entity traversal results kept by get_relevant_context (LRU-2)
+    TRAVERSAL_CACHE_SIZE = 1024
+    
+    # Random bytes fetched per os.urandom call for node IDs (8 bytes per ID)
+    ID_POOL_SIZE = 8192
+    
+    def __init__(self, driver: AsyncDriver, database: Optional[str] = None):
         """
         Initialize graph store with Neo4j driver.
         
         Args:
-            driver: Neo4j driver instance
+            driver: Async Neo4j driver (see make_driver); queries yield
+                the event loop while waiting on the server
+            database: Database name (defaults to settings.NEO4J_DATABASE)
         """
         self.driver = driver
-        logger.info("GraphStore initialized")
+        self._db = database or settings.NEO4J_DATABASE
+        
+        self._entity_cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        self._pref_cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        self._stats_cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        self._traversal_cache = LRUKCache(self.TRAVERSAL_CACHE_SIZE, k=2)
+        
+        self._id_pool = os.urandom(self.ID_POOL_SIZE)
+        self._id_pos = 0
+        self._id_lock = threading.Lock()
+        logger.info("GraphStore initialized", database=self._db)
+    
+    def _new_id(self, prefix: str) -> str:
+        """Return "<prefix>_<16 hex chars>" sliced from a pooled urandom buffer."""
+        with self._id_lock:
+            if self._id_pos >= self.ID_POOL_SIZE:
+                self._id_pool = os.urandom(self.ID_POOL_SIZE)
+                self._id_pos = 0
+            chunk = self._id_pool[self._id_pos:self._id_pos + 8]
+            self._id_pos += 8
+        return f"{prefix}_{chunk.hex()}"
+    
+    def _session(self) -> AsyncSession:
+        """Open a session on the configured database (skips the home-db lookup)."""
+        return self.driver.session(database=self._db)
+    
+    async def ensure_indexes(self, embedding_dimension: Optional[int] = None) -> None:
+        """
+        Create the indexes GraphStore's hot MATCHes rely on (idempotent).
+        
+        User.id, Fact.id and Context.id lookups are covered by the
+        uniqueness constraints in neo4j_schema.
+        
+        Args:
+            embedding_dimension: Also create the fact_embedding vector
+                index (cosine) for vectors of this size
+        """
+        async with self._session() as session:
+            for statement in GRAPH_INDEXES:
+                await (await session.run(statement)).consume()
+            
+            if embedding_dimension:
+                # Index options can't be parameters; interpolate a checked int
+                await (await session.run(f"""
+                    CREATE VECTOR INDEX {FACT_EMBEDDING_INDEX} IF NOT EXISTS
+                    FOR (f:Fact) ON (f.embedding)
+                    OPTIONS {{indexConfig: {{
+                        `vector.dimensions`: {int(embedding_dimension)},
+                        `vector.similarity_function`: 'cosine'
+                    }}}}
+                """)).consume()
+            
+            result = await session.run("SHOW INDEXES YIELD name RETURN collect(name) AS names")
+            names = (await result.single())["names"]
+        
+        logger.info("Graph indexes ensured", indexes=names)
     
     # ===== ENTITY OPERATIONS =====
     
@@ -54,13 +328,13 @@ class GraphStore:
             entity_id
         """
         
-        entity_id = f"ent_{uuid.uuid4().hex[:16]}"
+        entity_id = self._new_id("ent")
         
         if properties is None:
             properties = {}
         
-        with self.driver.session() as session:
-            result = session.run("""
+        async with self._session() as session:
+            result = await session.run("""
                 MERGE (e:Entity {name: $name})
                 ON CREATE SET 
                     e.id = $entity_id,
@@ -79,7 +353,11 @@ class GraphStore:
                 properties=properties
             )
             
-            actual_id = result.single()["entity_id"]
+            actual_id = (await result.single(strict=True))["entity_id"]
+            await result.consume()
+            self._entity_cache.pop(name)
+            # Other entities' cached traversals may include this one as a related node
+            self._traversal_cache.clear()
             
             logger.info(
                 "Entity created/updated",
@@ -90,6 +368,60 @@ class GraphStore:
             
             return actual_id
     
+    async def create_entities_bulk(self, entities: List[Dict]) -> List[str]:
+        """
+        Create or update many entities in one transaction.
+        
+        Args:
+            entities: Dicts with "name", "type" and optional "properties"
+            
+        Returns:
+            entity_ids in input order
+        """
+        
+        if not entities:
+            return []
+        
+        rows = [
+            {
+                "id": self._new_id("ent"),
+                "name": entity["name"],
+                "type": entity["type"],
+                "properties": entity.get("properties") or {}
+            }
+            for entity in entities
+        ]
+        
+        async with self._session() as session:
+            result = await session.run("""
+                UNWIND $rows AS row
+                MERGE (e:Entity {name: row.name})
+                ON CREATE SET 
+                    e.id = row.id,
+                    e.type = row.type,
+                    e.first_mentioned = datetime(),
+                    e.mention_count = 1
+                ON MATCH SET
+                    e.mention_count = e.mention_count + 1,
+                    e.last_mentioned = datetime()
+                SET e += row.properties
+                RETURN collect(e.id) as entity_ids
+            """, rows=rows)
+            
+            entity_ids = (await result.single())["entity_ids"]
+        
+        names = {row["name"] for row in rows}
+        for name in names:
+            self._entity_cache.pop(name)
+        self._traversal_cache.clear()
+        
+        logger.info(
+            "Entities created/updated in bulk",
+            count=len(entity_ids)
+        )
+        
+        return entity_ids
+    
     async def get_entity(self, name: str) -> Optional[Dict]:
         """
         Retrieve entity by name.
@@ -101,18 +433,23 @@ class GraphStore:
             Entity dict or None
         """
         
-        with self.driver.session() as session:
-            result = session.run("""
+        cached = self._entity_cache.get(name, _MISS)
+        if cached is not _MISS:
+            return dict(cached) if cached is not None else None
+        
+        async with self._session() as session:
+            result = await session.run("""
                 MATCH (e:Entity {name: $name})
                 RETURN e
             """, name=name)
             
-            record = result.single()
+            record = await result.single()
+            entity = dict(record["e"]) if record else None
             
-            if record:
-                return dict(record["e"])
+            # Misses are cached too; create_entity invalidates the name
+            self._entity_cache.set(name, entity)
             
-            return None
+            return dict(entity) if entity is not None else None
     
     async def link_entities(
         self,
@@ -137,24 +474,20 @@ class GraphStore:
         if properties is None:
             properties = {}
         
-        properties["created_at"] = datetime.now().isoformat()
-        
-        with self.driver.session() as session:
-            result = session.run(f"""
-                MATCH (e1:Entity {{name: $entity1}})
-                MATCH (e2:Entity {{name: $entity2}})
-                MERGE (e1)-[r:{relationship_type}]->(e2)
-                SET r += $properties
-                RETURN id(r) as rel_id
-            """,
+        async with self._session() as session:
+            result = await session.run(
+                _link_entities_query(relationship_type),
                 entity1=entity1_name,
                 entity2=entity2_name,
                 properties=properties
             )
             
-            success = result.single() is not None
+            success = (await result.single()) is not None
+            await result.consume()
             
             if success:
+                # New edges change multi-hop neighbourhoods beyond these two
+                self._traversal_cache.clear()
                 logger.info(
                     "Entities linked",
                     entity1=entity1_name,
@@ -173,7 +506,8 @@ class GraphStore:
         category: str = "knowledge",
         confidence: float = 1.0,
         source: str = "explicit",
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        embedding: Optional[List[float]] = None
     ) -> str:
         """
         Create a fact node.
@@ -185,40 +519,19 @@ class GraphStore:
             confidence: Confidence score (0.0-1.0)
             source: Source (explicit, implicit, inferred)
             context: Context ID if applicable
+            embedding: Fact embedding, stored for the fact_embedding
+                vector index (omitted when None)
             
         Returns:
             fact_id
         """
         
-        fact_id = f"fact_{uuid.uuid4().hex[:16]}"
+        fact_id = self._new_id("fact")
         
-        with self.driver.session() as session:
-            query = """
-                MATCH (u:User {id: $user_id})
-                CREATE (f:Fact {
-                    id: $fact_id,
-                    content: $content,
-                    category: $category,
-                    confidence: $confidence,
-                    source: $source,
-                    created_at: datetime(),
-                    updated_at: datetime(),
-                    deprecated: false
-                })
-                CREATE (u)-[:KNOWS {certainty: $confidence, learned_at: datetime()}]->(f)
-            """
-            
-            # Link to context if provided
-            if context:
-                query += """
-                WITH f
-                MATCH (ctx:Context {id: $context})
-                CREATE (f)-[:OCCURRED_IN]->(ctx)
-                """
-            
-            query += " RETURN f.id as fact_id"
+        async with self._session() as session:
+            query = _CREATE_FACT_WITH_CTX if context else _CREATE_FACT_NO_CTX
             
-            result = session.run(
+            result = await session.run(
                 query,
                 user_id=user_id,
                 fact_id=fact_id,
@@ -226,7 +539,8 @@ class GraphStore:
                 category=category,
                 confidence=confidence,
                 source=source,
-                context=context
+                context=context,
+                embedding=embedding
             )
             
             logger.info(
@@ -236,11 +550,150 @@ class GraphStore:
                 confidence=confidence
             )
             
-            record = result.single()
+            record = await result.single()
+            await result.consume()
+            self._stats_cache.pop(user_id)
+            # New Fact/OCCURRED_IN edges can appear in any cached traversal
+            self._traversal_cache.clear()
             if record:
                 return record["fact_id"]
             return None
     
+    async def create_facts_bulk(
+        self,
+        user_id: str,
+        facts: List[Dict]
+    ) -> List[str]:
+        """
+        Create many fact nodes in one transaction.
+        
+        Args:
+            user_id: User ID
+            facts: Dicts with "content" and optional "category",
+                "confidence", "source", "context" and "embedding" (same
+                defaults as create_fact)
+            
+        Returns:
+            fact_ids in input order
+        """
+        
+        if not facts:
+            return []
+        
+        rows = [
+            {
+                "id": self._new_id("fact"),
+                "content": fact["content"],
+                "category": fact.get("category", "knowledge"),
+                "confidence": fact.get("confidence", 1.0),
+                "source": fact.get("source", "explicit"),
+                "context": fact.get("context"),
+                "embedding": fact.get("embedding")
+            }
+            for fact in facts
+        ]
+        
+        async with self._session() as session:
+            result = await session.run("""
+                MATCH (u:User {id: $user_id})
+                UNWIND $rows AS row
+                CREATE (f:Fact {
+                    id: row.id,
+                    content: row.content,
+                    category: row.category,
+                    confidence: row.confidence,
+                    source: row.source,
+                    created_at: datetime(),
+                    updated_at: datetime(),
+                    deprecated: false,
+                    embedding: row.embedding
+                })
+                CREATE (u)-[:KNOWS {certainty: row.confidence, learned_at: datetime()}]->(f)
+                WITH f, row
+                OPTIONAL MATCH (ctx:Context {id: row.context})
+                FOREACH (_ IN CASE WHEN ctx IS NULL THEN [] ELSE [1] END |
+                    CREATE (f)-[:OCCURRED_IN]->(ctx)
+                )
+                RETURN collect(f.id) as fact_ids
+            """, user_id=user_id, rows=rows)
+            
+            fact_ids = (await result.single())["fact_ids"]
+        
+        self._stats_cache.pop(user_id)
+        self._traversal_cache.clear()
+        
+        logger.info(
+            "Facts created in bulk",
+            count=len(fact_ids)
+        )
+        
+        return fact_ids
+    
+    async def create_and_link_entities(
+        self,
+        fact_id: str,
+        entities: List[Dict]
+    ) -> List[str]:
+        """
+        Upsert entities and link a fact to them in one round trip.
+        
+        Same entity semantics as create_entity, same edge as
+        link_fact_to_entity's default (RELATES_TO).
+        
+        Args:
+            fact_id: Fact ID
+            entities: Dicts with "name", "type" and optional "properties"
+            
+        Returns:
+            entity_ids in input order (empty if the fact doesn't exist)
+        """
+        
+        if not entities:
+            return []
+        
+        rows = [
+            {
+                "id": self._new_id("ent"),
+                "name": entity["name"],
+                "type": entity["type"],
+                "properties": entity.get("properties") or {}
+            }
+            for entity in entities
+        ]
+        
+        async with self._session() as session:
+            result = await session.run("""
+                MATCH (f:Fact {id: $fact_id})
+                UNWIND $rows AS row
+                MERGE (e:Entity {name: row.name})
+                ON CREATE SET 
+                    e.id = row.id,
+                    e.type = row.type,
+                    e.first_mentioned = datetime(),
+                    e.mention_count = 1
+                ON MATCH SET
+                    e.mention_count = e.mention_count + 1,
+                    e.last_mentioned = datetime()
+                SET e += row.properties
+                MERGE (f)-[:RELATES_TO]->(e)
+                RETURN collect(e.id) as entity_ids
+            """, fact_id=fact_id, rows=rows)
+            
+            entity_ids = (await result.single(strict=True))["entity_ids"]
+        
+        for row in rows:
+            self._entity_cache.pop(row["name"])
+        if entity_ids:
+            self._traversal_cache.clear()
+        
+        logger.info(
+            "Entities created and linked",
+            fact_id=fact_id,
+            count=len(entity_ids)
+        )
+        
+        return entity_ids
+    
     async def link_fact_to_entity(
         self,
         fact_id: str,
@@ -259,18 +712,18 @@ class GraphStore:
             True if successful
         """
         
-        with self.driver.session() as session:
-            result = session.run(f"""
-                MATCH (f:Fact {{id: $fact_id}})
-                MATCH (e:Entity {{name: $entity_name}})
-                MERGE (f)-[r:{relationship_type}]->(e)
-                RETURN id(r) as rel_id
-            """,
+        async with self._session() as session:
+            result = await session.run(
+                _link_fact_query(relationship_type),
                 fact_id=fact_id,
                 entity_name=entity_name
             )
             
-            return result.single() is not None
+            linked = (await result.single()) is not None
+            await result.consume()
+            if linked:
+                self._traversal_cache.clear()
+            return linked
     
     async def get_facts(
         self,
@@ -278,10 +731,11 @@ class GraphStore:
         category: Optional[str] = None,
         context: Optional[str] = None,
         min_confidence: float = 0.0,
-        limit: int = 50
+        limit: int = 50,
+        cursor: Optional[datetime] = None
     ) -> List[Dict]:
         """
-        Retrieve facts with filters.
+        Retrieve facts with filters, newest first.
         
         Args:
             user_id: User ID
@@ -289,44 +743,29 @@ class GraphStore:
             context: Filter by context
             min_confidence: Minimum confidence threshold
             limit: Max results
+            cursor: Only return facts updated before this (keyset page
+                boundary; pass the last fact's updated_at)
             
         Returns:
             List of facts
         """
         
-        with self.driver.session() as session:
-            query = """
-                MATCH (u:User {id: $user_id})-[:KNOWS]->(f:Fact)
-                WHERE f.deprecated = false
-                  AND f.confidence >= $min_confidence
-            """
+        async with self._session() as session:
+            query = _GET_FACTS[(bool(category), bool(context), cursor is not None)]
             
             params = {
                 "user_id": user_id,
                 "min_confidence": min_confidence,
-                "limit": limit
+                "limit": limit,
+                "category": category,
+                "context": context,
+                "cursor": cursor
             }
             
-            if category:
-                query += " AND f.category = $category"
-                params["category"] = category
+            result = await session.run(query, **params)
             
-            if context:
-                query += """
-                    WITH f
-                    MATCH (f)-[:OCCURRED_IN]->(ctx:Context {id: $context})
-                """
-                params["context"] = context
-            
-            query += """
-                RETURN f
-                ORDER BY f.updated_at DESC
-                LIMIT $limit
-            """
-            
-            result = session.run(query, **params)
-            
-            facts = [dict(record["f"]) for record in result]
+            # Projected columns: no Node structures to decode
+            facts = [record.data() async for record in result]
             
             logger.info(
                 "Facts retrieved",
@@ -336,6 +775,112 @@ class GraphStore:
             
             return facts
     
+    async def get_facts_page(
+        self,
+        user_id: str,
+        category: Optional[str] = None,
+        context: Optional[str] = None,
+        min_confidence: float = 0.0,
+        limit: int = 50,
+        cursor: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Retrieve one keyset-paginated page of facts.
+        
+        Args:
+            Same as get_facts
+            
+        Returns:
+            Dict with facts and next_cursor (None on the last page)
+        """
+        
+        facts = await self.get_facts(
+            user_id,
+            category=category,
+            context=context,
+            min_confidence=min_confidence,
+            limit=limit,
+            cursor=cursor
+        )
+        
+        return {
+            "facts": facts,
+            "next_cursor": facts[-1]["updated_at"] if len(facts) == limit else None
+        }
+    
+    async def search_similar_facts(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        k: int = 5,
+        context: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Find the user's facts nearest to an embedding via the vector index.
+        
+        Results have the same shape as VectorStore.search_similar. Neo4j
+        reports cosine as (1 + cos) / 2, so similarity is in [0, 1].
+        
+        Args:
+            user_id: User ID
+            query_embedding: Query vector
+            k: Number of results to return
+            context: Only facts that occurred in this context
+            
+        Returns:
+            List of similar facts with scores
+        """
+        
+        context_match = """
+                MATCH (f)-[:OCCURRED_IN]->(:Context {id: $context})""" if context else ""
+        
+        async with self._session() as session:
+            # The index is global; over-fetch so per-user filtering can fill k
+            result = await session.run(f"""
+                CALL db.index.vector.queryNodes('{FACT_EMBEDDING_INDEX}', $candidates, $embedding)
+                YIELD node AS f, score
+                MATCH (:User {{id: $user_id}})-[:KNOWS]->(f)
+                WHERE f.deprecated = false{context_match}
+                RETURN f.id AS id,
+                       f.content AS content,
+                       f.category AS category,
+                       f.confidence AS confidence,
+                       f.source AS source,
+                       score
+                ORDER BY score DESC
+                LIMIT $k
+            """,
+                candidates=k * 4,
+                embedding=query_embedding,
+                user_id=user_id,
+                context=context,
+                k=k
+            )
+            
+            memories = [
+                {
+                    "id": record["id"],
+                    "content": record["content"],
+                    "metadata": {
+                        "category": record["category"],
+                        "confidence": record["confidence"],
+                        "source": record["source"],
+                        "context": context if context is not None else "general"
+                    },
+                    "distance": 1 - record["score"],
+                    "similarity": record["score"]
+                }
+                async for record in result
+            ]
+        
+        logger.info(
+            "Graph similarity search completed",
+            results_found=len(memories),
+            k=k
+        )
+        
+        return memories
+    
     # ===== CONFLICT RESOLUTION =====
     
     async def detect_contradictions(
@@ -358,38 +903,28 @@ class GraphStore:
         
         # Simple keyword-based contradiction detection
         # In production, use LLM to determine semantic contradictions
+        # A fact contradicts if it holds the opposite word of any pair
+        # whose other word appears in the new fact
+        needles = list({
+            word
+            for _, opposite in _NEGATION_AC.iter(new_fact_content.lower())
+            for word in opposite
+        })
         
-        with self.driver.session() as session:
-            # Get all existing facts
-            result = session.run("""
+        if not needles:
+            return []
+        
+        async with self._session() as session:
+            # Match server-side so only contradicting facts cross the wire
+            result = await session.run("""
                 MATCH (u:User {id: $user_id})-[:KNOWS]->(f:Fact)
                 WHERE f.deprecated = false
+                WITH f, toLower(f.content) AS content
+                WHERE any(word IN $needles WHERE content CONTAINS word)
                 RETURN f
-            """, user_id=user_id)
+            """, user_id=user_id, needles=needles)
             
-            existing_facts = [dict(record["f"]) for record in result]
-        
-        # Simple heuristic: check for negation keywords
-        contradictions = []
-        new_lower = new_fact_content.lower()
-        
-        negation_pairs = [
-            ("like", "dislike"),
-            ("love", "hate"),
-            ("prefer", "avoid"),
-            ("yes", "no"),
-            ("true", "false")
-        ]
-        
-        for fact in existing_facts:
-            fact_lower = fact["content"].lower()
-            
-            # Check for direct negation pairs
-            for pos, neg in negation_pairs:
-                if (pos in new_lower and neg in fact_lower) or \
-                   (neg in new_lower and pos in fact_lower):
-                    contradictions.append(fact)
-                    break
+            contradictions = [dict(record["f"]) async for record in result]
         
         if contradictions:
             logger.info(
@@ -417,10 +952,10 @@ class GraphStore:
             True if successful
         """
         
-        with self.driver.session() as session:
+        async with self._session() as session:
             if resolution == "new_wins":
                 # Deprecate old fact
-                session.run("""
+                await (await session.run("""
                     MATCH (old:Fact {id: $old_id})
                     MATCH (new:Fact {id: $new_id})
                     SET old.deprecated = true
@@ -429,11 +964,11 @@ class GraphStore:
                         resolution_date: datetime(),
                         winning_fact_id: $new_id
                     }]->(old)
-                """, old_id=old_fact_id, new_id=new_fact_id)
+                """, old_id=old_fact_id, new_id=new_fact_id)).consume()
                 
             elif resolution == "old_wins":
                 # Deprecate new fact
-                session.run("""
+                await (await session.run("""
                     MATCH (old:Fact {id: $old_id})
                     MATCH (new:Fact {id: $new_id})
                     SET new.deprecated = true
@@ -442,18 +977,21 @@ class GraphStore:
                         resolution_date: datetime(),
                         winning_fact_id: $old_id
                     }]->(new)
-                """, old_id=old_fact_id, new_id=new_fact_id)
+                """, old_id=old_fact_id, new_id=new_fact_id)).consume()
                 
             elif resolution == "coexist":
                 # Mark as contradicting but both active
-                session.run("""
+                await (await session.run("""
                     MATCH (old:Fact {id: $old_id})
                     MATCH (new:Fact {id: $new_id})
                     CREATE (new)-[:CONTRADICTS {
                         resolved: false,
                         resolution_date: datetime()
                     }]->(old)
-                """, old_id=old_fact_id, new_id=new_fact_id)
+                """, old_id=old_fact_id, new_id=new_fact_id)).consume()
+            
+            # Deprecation flags and CONTRADICTS edges show up in traversals
+            self._traversal_cache.clear()
             
             logger.info(
                 "Contradiction resolved",
@@ -464,6 +1002,78 @@ class GraphStore:
             
             return True
     
+    async def ingest_fact(
+        self,
+        user_id: str,
+        content: str,
+        entities: Optional[List[Dict]] = None,
+        category: str = "knowledge",
+        confidence: float = 1.0,
+        source: str = "explicit",
+        context: Optional[str] = None,
+        resolution: Optional[str] = None
+    ) -> Dict:
+        """
+        Store a fact with its entities and contradiction check in one go.
+        
+        Fact creation, entity upserts and contradiction detection don't
+        depend on each other, so they run concurrently (each on its own
+        pooled session); linking and resolution follow once they finish.
+        
+        Args:
+            user_id: User ID
+            content: Fact content
+            entities: Dicts with "name" and "type" to link the fact to
+            category: Category (preference, knowledge, context, opinion)
+            confidence: Confidence score (0.0-1.0)
+            source: Source (explicit, implicit, inferred)
+            context: Context ID if applicable
+            resolution: If set, resolve every contradiction with this
+                strategy ("new_wins", "old_wins", or "coexist")
+            
+        Returns:
+            Dict with fact_id, entity_ids and contradictions
+        """
+        
+        entities = entities or []
+        
+        fact_id, contradictions, *entity_ids = await asyncio.gather(
+            self.create_fact(
+                user_id=user_id,
+                content=content,
+                category=category,
+                confidence=confidence,
+                source=source,
+                context=context
+            ),
+            self.detect_contradictions(user_id, content),
+            *[
+                self.create_entity(name=entity["name"], entity_type=entity["type"])
+                for entity in entities
+            ]
+        )
+        
+        # The detection query may or may not have seen the new fact
+        contradictions = [f for f in contradictions if f.get("id") != fact_id]
+        
+        if fact_id:
+            dependent = [
+                self.link_fact_to_entity(fact_id=fact_id, entity_name=entity["name"])
+                for entity in entities
+            ]
+            if resolution:
+                dependent += [
+                    self.resolve_contradiction(old["id"], fact_id, resolution)
+                    for old in contradictions
+                ]
+            await asyncio.gather(*dependent)
+        
+        return {
+            "fact_id": fact_id,
+            "entity_ids": entity_ids,
+            "contradictions": contradictions
+        }
+    
     # ===== CONTEXT-AWARE RETRIEVAL =====
     
     async def get_relevant_context(
@@ -488,58 +1098,86 @@ class GraphStore:
             Dict with facts, entities, and relationships
         """
         
-        with self.driver.session() as session:
-            all_facts = []
-            all_entities = []
-            all_relationships = []
+        # Keyed by element_id so nodes reached from several entities are kept once
+        facts = {}
+        entities = {}
+        
+        # Traversals repeated across turns are served from the LRU-2 cache
+        pending = []
+        for entity_name in query_entities:
+            cached = self._traversal_cache.get(
+                (entity_name, max_hops, current_context, limit)
+            )
+            if cached is None:
+                if entity_name not in pending:
+                    pending.append(entity_name)
+            else:
+                facts.update(cached[0])
+                entities.update(cached[1])
+        
+        if pending:
+            # Variable-length bounds can't be parameters; interpolate a checked int
+            hops = int(max_hops)
+            if hops < 1:
+                raise ValueError(f"max_hops must be >= 1, got {max_hops}")
             
-            for entity_name in query_entities:
-                # Multi-hop traversal
-                query = f"""
-                    MATCH (e:Entity {{name: $entity_name}})
-                    -[*1..{max_hops}]-(related)
-                """
-                
-                if current_context:
-                    query += """
-                        -[:OCCURRED_IN]->(ctx:Context {id: $context})
-                    """
-                
-                query += """
-                    RETURN related, labels(related) as labels
+            context_hop = """
+                        -[:OCCURRED_IN]->(ctx:Context {id: $context})""" if current_context else ""
+            
+            # One round trip for all entities; LIMIT stays per entity
+            query = f"""
+                UNWIND $names AS name
+                CALL {{
+                    WITH name
+                    MATCH (e:Entity {{name: name}})
+                    -[*1..{hops}]-(related){context_hop}
+                    WITH DISTINCT related
+                    RETURN related
                     LIMIT $limit
-                """
-                
-                result = session.run(
+                }}
+                RETURN name,
+                       elementId(related) AS node_id,
+                       labels(related) AS labels,
+                       related {{.*}} AS props
+            """
+            
+            per_entity = {name: ({}, {}) for name in pending}
+            
+            async with self._session() as session:
+                result = await session.run(
                     query,
-                    entity_name=entity_name,
+                    names=pending,
                     context=current_context,
                     limit=limit
                 )
                 
-                for record in result:
-                    node = dict(record["related"])
+                async for record in result:
                     labels = record["labels"]
                     
                     if "Fact" in labels:
-                        all_facts.append(node)
+                        per_entity[record["name"]][0][record["node_id"]] = record["props"]
                     elif "Entity" in labels:
-                        all_entities.append(node)
-        
-        # Remove duplicates
-        unique_facts = {f["id"]: f for f in all_facts}.values()
-        unique_entities = {e.get("id", e.get("name")): e for e in all_entities}.values()
+                        per_entity[record["name"]][1][record["node_id"]] = record["props"]
+            
+            for entity_name, (entity_facts, entity_entities) in per_entity.items():
+                self._traversal_cache.set(
+                    (entity_name, max_hops, current_context, limit),
+                    (entity_facts, entity_entities)
+                )
+                facts.update(entity_facts)
+                entities.update(entity_entities)
         
+        # Copies, so callers can't mutate the cached traversal props
         result = {
-            "facts": list(unique_facts),
-            "entities": list(unique_entities),
-            "total_results": len(unique_facts) + len(unique_entities)
+            "facts": [dict(props) for props in facts.values()],
+            "entities": [dict(props) for props in entities.values()],
+            "total_results": len(facts) + len(entities)
         }
         
         logger.info(
             "Context retrieved",
-            facts=len(unique_facts),
-            entities=len(unique_entities)
+            facts=len(facts),
+            entities=len(entities)
         )
         
         return result
@@ -566,10 +1204,10 @@ class GraphStore:
             preference_id
         """
         
-        pref_id = f"pref_{uuid.uuid4().hex[:16]}"
+        pref_id = self._new_id("pref")
         
-        with self.driver.session() as session:
-            result = session.run("""
+        async with self._session() as session:
+            result = await session.run("""
                 MATCH (u:User {id: $user_id})
                 MERGE (p:Preference {key: $key})
                 ON CREATE SET
@@ -594,7 +1232,13 @@ class GraphStore:
                 strength=strength
             )
             
-            actual_id = result.single()["pref_id"]
+            actual_id = (await result.single(strict=True))["pref_id"]
+            await result.consume()
+            
+            # Preference nodes are merged by key across users, so any
+            # user's cached preferences may change
+            self._pref_cache.clear()
+            self._stats_cache.pop(user_id)
             
             logger.info(
                 "Preference created/updated",
@@ -621,8 +1265,13 @@ class GraphStore:
             Dict of key-value preferences
         """
         
-        with self.driver.session() as session:
-            result = session.run("""
+        cache_key = (user_id, min_strength)
+        cached = self._pref_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        async with self._session() as session:
+            result = await session.run("""
                 MATCH (u:User {id: $user_id})-[r:HAS_PREFERENCE]->(p:Preference)
                 WHERE r.strength >= $min_strength
                 RETURN p.key as key, p.value as value
@@ -632,21 +1281,33 @@ class GraphStore:
                 min_strength=min_strength
             )
             
-            preferences = {
-                record["key"]: record["value"]
-                for record in result
-            }
+            # One tuple extraction per row instead of two Record lookups
+            preferences = dict(await result.values("key", "value"))
+            
+            self._pref_cache.set(cache_key, preferences)
             
             logger.info(
                 "Preferences retrieved",
                 count=len(preferences)
             )
             
-            return preferences
+            return dict(preferences)
     
     # ===== STATISTICS & UTILITIES =====
     
-    def get_statistics(self, user_id: str) -> Dict:
+    def invalidate_statistics(self, user_id: Optional[str] = None) -> None:
+        """
+        Drop cached statistics for one user, or for everyone if user_id is None.
+        
+        Rule counts are written by UserRuleSystem, which calls this on
+        every rule change (see MemoryController).
+        """
+        if user_id is None:
+            self._stats_cache.clear()
+        else:
+            self._stats_cache.pop(user_id)
+    
+    async def get_statistics(self, user_id: str) -> Dict:
         """
         Get graph statistics for user.
         
@@ -657,8 +1318,12 @@ class GraphStore:
             Statistics dict
         """
         
-        with self.driver.session() as session:
-            result = session.run("""
+        cached = self._stats_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        
+        async with self._session() as session:
+            result = await session.run("""
                 MATCH (u:User {id: $user_id})
                 OPTIONAL MATCH (u)-[:KNOWS]->(f:Fact)
                 OPTIONAL MATCH (u)-[:HAS_PREFERENCE]->(p:Preference)
@@ -669,13 +1334,17 @@ class GraphStore:
                     count(DISTINCT r) as rule_count
             """, user_id=user_id)
             
-            record = result.single()
+            record = await result.single()
+            fact_count, preference_count, rule_count = record.values()
             
-            return {
-                "facts": record["fact_count"],
-                "preferences": record["preference_count"],
-                "rules": record["rule_count"]
+            stats = {
+                "facts": fact_count,
+                "preferences": preference_count,
+                "rules": rule_count
             }
+            self._stats_cache.set(user_id, stats)
+            
+            return dict(stats)
     
     async def export_graph(self, user_id: str) -> Dict:
         """
@@ -688,31 +1357,36 @@ class GraphStore:
             Complete graph export
         """
         
-        with self.driver.session() as session:
-            # Export facts
-            facts = session.run("""
-                MATCH (u:User {id: $user_id})-[:KNOWS]->(f:Fact)
-                RETURN f
-            """, user_id=user_id)
-            
-            # Export preferences
-            prefs = session.run("""
-                MATCH (u:User {id: $user_id})-[:HAS_PREFERENCE]->(p:Preference)
-                RETURN p
+        async with self._session() as session:
+            # One round trip: each collection is gathered in its own subquery
+            result = await session.run("""
+                MATCH (u:User {id: $user_id})
+                CALL {
+                    WITH u
+                    MATCH (u)-[:KNOWS]->(f:Fact)
+                    RETURN collect(f {.*}) AS facts
+                }
+                CALL {
+                    WITH u
+                    MATCH (u)-[:HAS_PREFERENCE]->(p:Preference)
+                    RETURN collect(p {.*}) AS prefs
+                }
+                CALL {
+                    WITH u
+                    MATCH (u)-[:KNOWS]->(:Fact)-[:RELATES_TO]->(e:Entity)
+                    RETURN collect(DISTINCT e {.*}) AS entities
+                }
+                RETURN facts, prefs, entities
             """, user_id=user_id)
             
-            # Export entities
-            entities = session.run("""
-                MATCH (u:User {id: $user_id})-[:KNOWS]->(f:Fact)-[:RELATES_TO]->(e:Entity)
-                RETURN DISTINCT e
-            """, user_id=user_id)
+            record = await result.single()
             
             export = {
                 "user_id": user_id,
                 "export_date": datetime.now().isoformat(),
-                "facts": [dict(record["f"]) for record in facts],
-                "preferences": [dict(record["p"]) for record in prefs],
-                "entities": [dict(record["e"]) for record in entities]
+                "facts": record["facts"] if record else [],
+                "preferences": record["prefs"] if record else [],
+                "entities": record["entities"] if record else []
             }
             
             logger.info(
@@ -3,17 +3,41 @@ Memory Controller for NIRE
 Orchestrates hybrid memory (vector + graph) with user rule integration.
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import asyncio
+import re
+import ahocorasick
 import structlog
 from datetime import datetime
+from neo4j import AsyncDriver
 
+from backend.config import settings
 from backend.memory.vector_store import VectorStore
-from backend.memory.graph_store import GraphStore
+from backend.memory.graph_store import GraphStore, make_driver
 from backend.memory.embeddings import EmbeddingGenerator
 from backend.memory.user_rule_system import UserRuleSystem
 
 logger = structlog.get_logger()
 
+# Heuristic fact patterns: (category, confidence, keywords), in emit order
+FACT_PATTERNS = (
+    ("preference", 0.8, ("like", "prefer", "love", "hate", "dislike", "enjoy")),
+    ("knowledge", 0.9, ("i am", "my name is", "i work", "i live"))
+)
+
+# Every keyword maps to its category, so one pass over a message finds
+# all matching categories (substring semantics, like `in`)
+_FACT_KEYWORD_AC = ahocorasick.Automaton()
+for _category, _, _keywords in FACT_PATTERNS:
+    for _keyword in _keywords:
+        _FACT_KEYWORD_AC.add_word(_keyword, _category)
+_FACT_KEYWORD_AC.make_automaton()
+
+# Words of 3+ characters that start with a letter, keeping internal
+# apostrophes and hyphens ("O'Brien", "Jean-Luc", "GPT-4"); Unicode-aware.
+# Callers keep the ones whose first letter is uppercase.
+_ENTITY_RE = re.compile(r"(?<![\w'-])[^\W\d_][\w'-]{2,}")
+
 
 class MemoryController:
     """
@@ -24,29 +48,70 @@ class MemoryController:
     
     def __init__(
         self,
-        neo4j_driver,
+        graph_driver: Optional[AsyncDriver] = None,
         user_id: str = "user_001"
     ):
         """
         Initialize memory controller.
         
         Args:
-            neo4j_driver: Neo4j driver instance
+            graph_driver: Async Neo4j driver for the graph store and rule
+                system (see graph_store.make_driver). If not given, one is
+                created from settings and shut down by close(); a driver
+                passed in stays owned by the caller
             user_id: Default user ID
+            
+        Raises:
+            TypeError: If graph_driver is not an AsyncDriver (e.g. a
+                synchronous GraphDatabase.driver)
         """
+        if graph_driver is not None and not isinstance(graph_driver, AsyncDriver):
+            raise TypeError(
+                "MemoryController needs a neo4j AsyncDriver "
+                "(AsyncGraphDatabase.driver or graph_store.make_driver), "
+                f"got {type(graph_driver).__name__}"
+            )
+        
         self.user_id = user_id
+        self._owns_driver = graph_driver is None
         
         # Initialize stores
         self.vector_store = VectorStore()
-        self.graph_store = GraphStore(neo4j_driver)
+        self.graph_store = GraphStore(graph_driver or make_driver())
         self.embedder = EmbeddingGenerator()
-        self.rule_system = UserRuleSystem(neo4j_driver)
+        # Shares the graph store's async driver and connection pool; rule
+        # writes also invalidate the graph store's cached rule counts
+        self.rule_system = UserRuleSystem(
+            self.graph_store.driver,
+            on_change=self.graph_store.invalidate_statistics
+        )
         
         logger.info(
             "MemoryController initialized",
             user_id=user_id
         )
     
+    async def initialize(self) -> None:
+        """
+        Create the graph indexes the controller relies on (call once at startup).
+        
+        With GRAPH_VECTOR_SEARCH enabled this includes the fact
+        embedding vector index.
+        """
+        await self.graph_store.ensure_indexes(
+            embedding_dimension=self.embedder.get_dimension()
+            if settings.GRAPH_VECTOR_SEARCH else None
+        )
+    
+    async def close(self) -> None:
+        """Release the controller's resources (the Neo4j driver, if it created it)."""
+        await self.embedder.aclose()
+        
+        if self._owns_driver:
+            await self.graph_store.driver.close()
+        
+        logger.info("MemoryController closed", user_id=self.user_id)
+    
     # ===== MEMORY STORAGE =====
     
     async def process_conversation(
@@ -75,55 +140,51 @@ class MemoryController:
         facts = await self._extract_facts(user_message, assistant_response)
         
         # 2. Store in both vector and graph
+        # One forward pass and one vector-store insert for the whole turn
+        texts = [fact["content"] for fact in facts]
+        embeddings = await self.embedder.encode_batch(texts)
+        context_value = context if context is not None else "general"
+        
+        if settings.GRAPH_VECTOR_SEARCH:
+            # Embeddings live on the :Fact nodes; one store, one write per fact
+            vector_ids = []
+            graph_ids = await asyncio.gather(*[
+                self._store_fact_in_graph(fact, context, embedding)
+                for fact, embedding in zip(facts, embeddings)
+            ])
+        else:
+            # The vector insert and each fact's graph writes are independent,
+            # so their round trips overlap
+            vector_ids, graph_ids = await asyncio.gather(
+                self.vector_store.add_memories_batch(
+                    texts=texts,
+                    embeddings=embeddings,
+                    metadatas=[
+                        {
+                            "category": fact["category"],
+                            "confidence": fact["confidence"],
+                            "source": "conversation",
+                            "context": context_value
+                        }
+                        for fact in facts
+                    ]
+                ),
+                asyncio.gather(*[
+                    self._store_fact_in_graph(fact, context)
+                    for fact in facts
+                ])
+            )
+        
         stored_memories = {
-            "vector_ids": [],
-            "fact_ids": [],
-            "entity_ids": []
+            "vector_ids": vector_ids,
+            "fact_ids": [fact_id for fact_id, _ in graph_ids],
+            "entity_ids": [
+                entity_id
+                for _, entity_ids in graph_ids
+                for entity_id in entity_ids
+            ]
         }
         
-        for fact in facts:
-            # Generate embedding
-            embedding = await self.embedder.encode(fact["content"])
-            
-            # Store in vector store
-            vector_id = await self.vector_store.add_memory(
-                text=fact["content"],
-                embedding=embedding,
-                metadata={
-                    "category": fact["category"],
-                    "confidence": fact["confidence"],
-                    "source": "conversation",
-                    "context": context if context is not None else "general"
-                }
-            )
-            stored_memories["vector_ids"].append(vector_id)
-            
-            # Store in graph store
-            fact_id = await self.graph_store.create_fact(
-                user_id=self.user_id,
-                content=fact["content"],
-                category=fact["category"],
-                confidence=fact["confidence"],
-                source="conversation",
-                context=context
-            )
-            stored_memories["fact_ids"].append(fact_id)
-            
-            # Extract and link entities
-            if "entities" in fact:
-                for entity in fact["entities"]:
-                    entity_id = await self.graph_store.create_entity(
-                        name=entity["name"],
-                        entity_type=entity["type"]
-                    )
-                    stored_memories["entity_ids"].append(entity_id)
-                    
-                    # Link fact to entity
-                    await self.graph_store.link_fact_to_entity(
-                        fact_id=fact_id,
-                        entity_name=entity["name"]
-                    )
-        
         logger.info(
             "Conversation processed",
             facts_stored=len(facts),
@@ -132,6 +193,42 @@ class MemoryController:
         
         return stored_memories
     
+    async def _store_fact_in_graph(
+        self,
+        fact: Dict,
+        context: Optional[str],
+        embedding: Optional[List[float]] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Create a fact node plus its entities and links.
+        
+        Args:
+            fact: Extracted fact (see _extract_facts)
+            context: Optional context ID
+            embedding: Stored on the node when graph vector search is on
+            
+        Returns:
+            (fact_id, entity_ids)
+        """
+        
+        fact_id = await self.graph_store.create_fact(
+            user_id=self.user_id,
+            content=fact["content"],
+            category=fact["category"],
+            confidence=fact["confidence"],
+            source="conversation",
+            context=context,
+            embedding=embedding
+        )
+        
+        # All entities and their links land in one transaction
+        entity_ids = await self.graph_store.create_and_link_entities(
+            fact_id=fact_id,
+            entities=fact.get("entities", [])
+        )
+        
+        return fact_id, entity_ids
+    
     async def _extract_facts(
         self,
         user_message: str,
@@ -155,33 +252,22 @@ class MemoryController:
         
         # Simple heuristic-based extraction
         # In production, use LLM with structured output
-        
-        # Check for preference statements
-        preference_keywords = ["like", "prefer", "love", "hate", "dislike", "enjoy"]
-        user_lower = user_message.lower()
-        
-        for keyword in preference_keywords:
-            if keyword in user_lower:
-                facts.append({
-                    "content": user_message,
-                    "category": "preference",
-                    "confidence": 0.8,
-                    "entities": []
-                })
+        # Case-folded once; the scan stops as soon as every category matched
+        hits = set()
+        for _, category in _FACT_KEYWORD_AC.iter(user_message.casefold()):
+            hits.add(category)
+            if len(hits) == len(FACT_PATTERNS):
                 break
         
-        # Check for factual statements ("I am", "My name is", etc.)
-        factual_keywords = ["i am", "my name is", "i work", "i live"]
-        
-        for keyword in factual_keywords:
-            if keyword in user_lower:
+        # Preference statements, then factual ones ("I am", "My name is", etc.)
+        for category, confidence, _ in FACT_PATTERNS:
+            if category in hits:
                 facts.append({
                     "content": user_message,
-                    "category": "knowledge",
-                    "confidence": 0.9,
+                    "category": category,
+                    "confidence": confidence,
                     "entities": []
                 })
-                break
         
         # If no specific pattern, store as general context
         if not facts:
@@ -220,22 +306,30 @@ class MemoryController:
         
         logger.info("Retrieving context", query=query[:50])
         
-        # 1. Check user rules if enabled
+        # 1. Check user rules if enabled, embedding the query meanwhile
+        embed_task = asyncio.create_task(self.embedder.encode(query))
+        
         active_rules = []
         if check_rules:
-            active_rules = self.rule_system.get_active_rules(
-                user_id=self.user_id,
-                context=context
-            )
-            
-            # Check for conflicts
-            conflicts = self.rule_system.check_conflicts(
-                user_id=self.user_id,
-                user_request=query,
-                context=context
-            )
+            try:
+                active_rules, conflicts = await asyncio.gather(
+                    self.rule_system.get_active_rules(
+                        user_id=self.user_id,
+                        context=context
+                    ),
+                    self.rule_system.check_conflicts(
+                        user_id=self.user_id,
+                        user_request=query,
+                        context=context
+                    )
+                )
+            except BaseException:
+                embed_task.cancel()
+                raise
             
             if conflicts:
+                # The embedding isn't needed for an override decision
+                embed_task.cancel()
                 logger.warning(
                     "User rule conflicts detected",
                     conflicts=len(conflicts)
@@ -247,33 +341,37 @@ class MemoryController:
                     "active_rules": active_rules
                 }
         
-        # 2. Vector search (semantic similarity)
-        query_embedding = await self.embedder.encode(query)
+        query_embedding = await embed_task
         
-        vector_results = await self.vector_store.search_similar(
-            query_embedding=query_embedding,
-            k=k,
-            filter_metadata={"context": context} if context else None
-        )
-        
-        # 3. Extract entities from query for graph search
+        # 2. Extract entities from query for graph search
         query_entities = self._extract_entity_names(query)
+        filter_metadata = {"context": context} if context else None
         
-        # 4. Graph traversal (relational context)
-        graph_results = {}
-        if query_entities:
-            graph_results = await self.graph_store.get_relevant_context(
+        # 3-5. Vector search (semantic similarity), graph traversal
+        # (relational context) and user preferences are independent,
+        # so their round trips run concurrently
+        vector_results, graph_results, preferences = await asyncio.gather(
+            self.graph_store.search_similar_facts(
+                user_id=self.user_id,
+                query_embedding=query_embedding,
+                k=k,
+                context=context
+            ) if settings.GRAPH_VECTOR_SEARCH else self.vector_store.search_similar(
+                query_embedding=query_embedding,
+                k=k,
+                filter_metadata=filter_metadata
+            ),
+            self.graph_store.get_relevant_context(
                 user_id=self.user_id,
                 query_entities=query_entities,
                 current_context=context,
                 max_hops=2,
                 limit=k
+            ) if query_entities else asyncio.sleep(0, result={}),
+            self.graph_store.get_preferences(
+                user_id=self.user_id,
+                min_strength=0.5
             )
-        
-        # 5. Get user preferences
-        preferences = await self.graph_store.get_preferences(
-            user_id=self.user_id,
-            min_strength=0.5
         )
         
         # 6. Merge results
@@ -310,19 +408,12 @@ class MemoryController:
             List of potential entity names
         """
         
-        # Simple approach: extract capitalized words
-        words = text.split()
-        entities = []
+        # All-lowercase text (the common chat case) can't contain a match
+        if text.islower():
+            return []
         
-        for word in words:
-            # Remove punctuation
-            word = word.strip(".,!?;:")
-            
-            # Check if capitalized (and not first word)
-            if word and word[0].isupper() and len(word) > 2:
-                entities.append(word)
-        
-        return entities
+        # Simple approach: extract capitalized words in one C-level scan
+        return [word for word in _ENTITY_RE.findall(text) if word[0].isupper()]
     
     # ===== PREFERENCE MANAGEMENT =====
     
@@ -377,7 +468,7 @@ class MemoryController:
     
     # ===== STATISTICS & UTILITIES =====
     
-    def get_statistics(self) -> Dict:
+    async def get_statistics(self) -> Dict:
         """
         Get comprehensive memory statistics.
         
@@ -386,14 +477,15 @@ class MemoryController:
         """
         
         vector_stats = self.vector_store.get_statistics()
-        graph_stats = self.graph_store.get_statistics(self.user_id)
-        rule_stats = self.rule_system.get_rule_statistics(self.user_id)
+        graph_stats = await self.graph_store.get_statistics(self.user_id)
+        rule_stats = await self.rule_system.get_rule_statistics(self.user_id)
         
         return {
             "vector_store": vector_stats,
             "graph_store": graph_stats,
             "user_rules": rule_stats,
-            "embedding_dimension": self.embedder.get_dimension()
+            "embedding_dimension": self.embedder.get_dimension(),
+            "embedding_cache": self.embedder.get_cache_stats()
         }
     
     async def export_all_memories(self) -> Dict:
@@ -404,14 +496,13 @@ class MemoryController:
             Complete memory export
         """
         
-        # Get recent vector memories
-        vector_memories = await self.vector_store.get_recent_memories(limit=1000)
-        
-        # Get graph export
-        graph_export = await self.graph_store.export_graph(self.user_id)
-        
-        # Get user rules
-        user_rules = self.rule_system.export_rules(self.user_id)
+        # The sources are independent, so fetch them concurrently
+        vector_memories, graph_export, user_rules, statistics = await asyncio.gather(
+            self.vector_store.get_recent_memories(limit=1000),
+            self.graph_store.export_graph(self.user_id),
+            self.rule_system.export_rules(self.user_id),
+            self.get_statistics()
+        )
         
         export = {
             "export_date": datetime.now().isoformat(),
@@ -419,7 +510,7 @@ class MemoryController:
             "vector_memories": vector_memories,
             "graph_data": graph_export,
             "user_rules": user_rules,
-            "statistics": self.get_statistics()
+            "statistics": statistics
         }
         
         logger.info(
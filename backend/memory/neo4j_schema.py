@@ -164,48 +164,126 @@ MATCH (u:User {id: 'user_001'})-[:HAS_CONTEXT]->(ctx:Context)
 RETURN ctx.id, ctx.scenario, ctx.description;
 """
 
+def _split_statements(script):
+    """
+    Split a Cypher script on semicolons outside string literals.
+    
+    Lines starting with "--" are comments: they stay in the output (the
+    caller filters on them) but their text is skipped, so an apostrophe
+    or semicolon in a comment neither opens a string nor splits.
+    """
+    statements = []
+    start = 0
+    quote = None
+    escaped = False
+    comment = False
+    line_start = True
+    
+    for pos, char in enumerate(script):
+        if comment:
+            if char == '\n':
+                comment = False
+                line_start = True
+        elif quote:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif line_start and char in ' \t':
+            continue
+        elif line_start and script.startswith('--', pos):
+            comment = True
+        else:
+            line_start = char == '\n'
+            if char in "'\"`":
+                quote = char
+            elif char == ';':
+                statements.append(script[start:pos])
+                start = pos + 1
+    
+    statements.append(script[start:])
+    return statements
+
+
+# Parsed once at import. Chunks opening with a comment and
+# "-- =" separator blocks are skipped, as before.
+_SCHEMA_STATEMENTS = tuple(
+    stmt
+    for stmt in (chunk.strip() for chunk in _split_statements(NEO4J_SCHEMA_INIT))
+    if stmt and not stmt.startswith('--') and '-- =' not in stmt
+)
+
+# Schema commands can't share a transaction with data writes
+_AUTOCOMMIT_PREFIXES = ("CREATE CONSTRAINT", "CREATE INDEX", "DROP ", "SHOW ")
+
+# (statement number, statement) pairs
+_DDL_STATEMENTS = tuple(
+    (i, stmt)
+    for i, stmt in enumerate(_SCHEMA_STATEMENTS, 1)
+    if stmt.upper().startswith(_AUTOCOMMIT_PREFIXES)
+)
+_DATA_STATEMENTS = tuple(
+    (i, stmt)
+    for i, stmt in enumerate(_SCHEMA_STATEMENTS, 1)
+    if not stmt.upper().startswith(_AUTOCOMMIT_PREFIXES)
+)
+
+
+def _run_data_statements(tx, statements):
+    """Transaction function: run every data statement in one transaction."""
+    for _, statement in statements:
+        tx.run(statement).consume()
+
+
 # Python script to execute schema
 def initialize_neo4j_schema(driver):
     """
     Execute Neo4j schema initialization.
     
+    Constraints and indexes run as auto-commit statements (Neo4j
+    requires it); the data statements are then committed together in
+    a single write transaction.
+    
     Args:
         driver: Neo4j driver instance
     """
     import structlog
     logger = structlog.get_logger()
     
-    # Split by statements (simple approach)
-    statements = [
-        stmt.strip() 
-        for stmt in NEO4J_SCHEMA_INIT.split(';')
-        if stmt.strip() and not stmt.strip().startswith('--')
-    ]
+    total = len(_SCHEMA_STATEMENTS)
     
     with driver.session() as session:
-        for i, statement in enumerate(statements, 1):
+        for i, statement in _DDL_STATEMENTS:
             try:
-                # Skip comment blocks
-                if '-- =' in statement:
-                    continue
-                
-                # Execute statement
-                result = session.run(statement)
-                
                 # Consume result to avoid warnings
-                try:
-                    result.consume()
-                    logger.info(f"Executed schema statement {i}/{len(statements)}")
-                except Exception:
-                    # Some statements don't return results
-                    pass
-                    
+                session.run(statement).consume()
+                logger.info("Executed schema statement", statement_no=i, total=total)
+                
             except Exception as e:
                 logger.error(
-                    f"Failed to execute statement {i}",
+                    "Failed to execute statement",
+                    statement_no=i,
                     statement=statement[:100],
                     error=str(e)
                 )
+        
+        if _DATA_STATEMENTS:
+            try:
+                session.execute_write(_run_data_statements, _DATA_STATEMENTS)
+                logger.info(
+                    "Executed data statements in one transaction",
+                    count=len(_DATA_STATEMENTS)
+                )
+                
+            except Exception as e:
+                # The transaction rolled back; none of the data statements applied
+                logger.error(
+                    "Failed to execute data statements",
+                    statements=[i for i, _ in _DATA_STATEMENTS],
+                    error=str(e)
+                )
     
     logger.info("Neo4j schema initialization complete")
 
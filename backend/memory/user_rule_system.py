@@ -3,14 +3,30 @@ User Rule System for Unrestricted NIRE
 Stores and manages user-defined behavioral rules in Knowledge Graph.
 """
 
-from typing import List, Dict, Optional
-from datetime import datetime
-from neo4j import GraphDatabase
+from typing import Callable, List, Dict, Optional
+from neo4j import AsyncDriver, AsyncManagedTransaction
+import os
+import time
+import ahocorasick
 import structlog
 
+from backend.config import settings
+from backend.core.priorities import PRIORITY_LEVEL, PRIORITY_RANK
+from backend.utils.cache import TTLCache
+
 logger = structlog.get_logger()
 
 
+def _new_rule_id() -> str:
+    """
+    Return a time-ordered rule ID: nanosecond clock plus 32 random bits.
+    
+    Unlike the old per-second timestamp IDs, rules created in the same
+    second (or the same import batch) never collide on rule_id_unique.
+    """
+    return f"rule_{time.time_ns():016x}{os.urandom(4).hex()}"
+
+
 class UserRuleSystem:
     """
     Manages user-defined behavioral rules in Neo4j.
@@ -22,34 +38,100 @@ class UserRuleSystem:
     - Rules stored persistently in Knowledge Graph
     """
     
-    def __init__(self, neo4j_driver):
+    # get_active_rules results are read on every retrieval but only change
+    # through this class, which invalidates them on every rule write
+    CACHE_TTL = 60.0
+    CACHE_SIZE = 128
+    
+    def __init__(
+        self,
+        neo4j_driver: AsyncDriver,
+        database: Optional[str] = None,
+        on_change: Optional[Callable[[Optional[str]], None]] = None
+    ):
+        """
+        Args:
+            neo4j_driver: Async Neo4j driver (see graph_store.make_driver);
+                its pooled connections are shared with the other stores
+            database: Database name (defaults to settings.NEO4J_DATABASE)
+            on_change: Called after every rule write with the affected
+                user_id (None if unknown), so other caches holding rule
+                data can drop it (e.g. GraphStore.invalidate_statistics)
+        """
         self.driver = neo4j_driver
-        self._initialize_schema()
+        self._db = database or settings.NEO4J_DATABASE
+        self._on_change = on_change
+        self._rules_cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        # (user_id, context) -> (rules, conflict automaton) for check_conflicts
+        self._conflict_cache = TTLCache(self.CACHE_SIZE, self.CACHE_TTL)
+        self._schema_ready = False
+    
+    async def _run(self, mode: str, query: str, **params) -> List[Dict]:
+        """
+        Run one query in a managed transaction and return its rows as dicts.
+        
+        Args:
+            mode: "read" or "write" (retried and routed accordingly)
+            query: Cypher query
+            **params: Query parameters
+        """
+        await self._ensure_schema()
+        
+        async def work(tx: AsyncManagedTransaction) -> List[Dict]:
+            result = await tx.run(query, **params)
+            return await result.data()
+        
+        async with self.driver.session(database=self._db) as session:
+            if mode == "read":
+                return await session.execute_read(work)
+            return await session.execute_write(work)
     
-    def _initialize_schema(self):
-        """Create necessary constraints and indexes for rule system."""
-        with self.driver.session() as session:
+    async def _ensure_schema(self):
+        """Create necessary constraints and indexes for rule system (once)."""
+        if self._schema_ready:
+            return
+        
+        async with self.driver.session(database=self._db) as session:
             # Constraint: Unique rule IDs
-            session.run("""
+            await (await session.run("""
                 CREATE CONSTRAINT rule_id_unique IF NOT EXISTS
                 FOR (r:UserRule) REQUIRE r.rule_id IS UNIQUE
-            """)
+            """)).consume()
             
             # Index: Priority for fast filtering
-            session.run("""
+            await (await session.run("""
                 CREATE INDEX rule_priority IF NOT EXISTS
                 FOR (r:UserRule) ON (r.priority)
-            """)
+            """)).consume()
             
             # Index: Context for contextual filtering
-            session.run("""
+            await (await session.run("""
                 CREATE INDEX rule_context IF NOT EXISTS
                 FOR (r:UserRule) ON (r.context)
-            """)
+            """)).consume()
             
-            logger.info("User rule schema initialized")
+            # Index: Active rules by priority (min_priority seeks)
+            await (await session.run("""
+                CREATE INDEX rule_active_priority IF NOT EXISTS
+                FOR (r:UserRule) ON (r.active, r.priority)
+            """)).consume()
+        
+        self._schema_ready = True
+        logger.info("User rule schema initialized")
+    
+    def _invalidate(self, user_id: Optional[str] = None):
+        """Drop cached rules for one user, or for everyone if user_id is None."""
+        if user_id is None:
+            self._rules_cache.clear()
+            self._conflict_cache.clear()
+        else:
+            self._rules_cache.discard_where(lambda key: key[0] == user_id)
+            self._conflict_cache.discard_where(lambda key: key[0] == user_id)
+        
+        if self._on_change is not None:
+            self._on_change(user_id)
     
-    def create_rule(
+    async def create_rule(
         self,
         user_id: str,
         rule_text: str,
@@ -71,10 +153,9 @@ class UserRuleSystem:
             rule_id of created rule
         """
         
-        rule_id = f"rule_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        rule_id = _new_rule_id()
         
-        with self.driver.session() as session:
-            result = session.run("""
+        rows = await self._run("write", """
                 MATCH (u:User {id: $user_id})
                 CREATE (r:UserRule {
                     rule_id: $rule_id,
@@ -90,24 +171,26 @@ class UserRuleSystem:
                 CREATE (u)-[:HAS_RULE]->(r)
                 RETURN r.rule_id as rule_id
             """, 
-                user_id=user_id,
-                rule_id=rule_id,
-                rule_text=rule_text,
-                priority=priority,
-                context=context,
-                metadata=metadata or {}
-            )
-            
-            logger.info(
-                "User rule created",
-                rule_id=rule_id,
-                user_id=user_id,
-                priority=priority
-            )
-            
-            return result.single()["rule_id"]
+            user_id=user_id,
+            rule_id=rule_id,
+            rule_text=rule_text,
+            priority=priority,
+            context=context,
+            metadata=metadata or {}
+        )
+        
+        self._invalidate(user_id)
+        
+        logger.info(
+            "User rule created",
+            rule_id=rule_id,
+            user_id=user_id,
+            priority=priority
+        )
+        
+        return rows[0]["rule_id"]
     
-    def get_active_rules(
+    async def get_active_rules(
         self,
         user_id: str,
         context: Optional[str] = None,
@@ -125,61 +208,55 @@ class UserRuleSystem:
             List of active rules
         """
         
-        # Priority hierarchy
-        priority_order = {
-            "critical": 4,
-            "high": 3,
-            "normal": 2,
-            "low": 1
-        }
-        
-        with self.driver.session() as session:
-            # Build query based on filters
-            query = """
-                MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
-                WHERE r.active = true
-            """
-            
-            params = {"user_id": user_id}
-            
-            # Context filter
-            if context:
-                query += " AND (r.context = $context OR r.context = 'all')"
-                params["context"] = context
-            
-            query += """
-                RETURN r.rule_id as rule_id,
-                       r.rule as rule,
-                       r.priority as priority,
-                       r.context as context,
-                       r.created_at as created_at,
-                       r.metadata as metadata
-                ORDER BY r.priority DESC, r.created_at DESC
-            """
-            
-            result = session.run(query, **params)
-            
-            rules = []
-            for record in result:
-                rule_dict = dict(record)
-                
-                # Filter by minimum priority if specified
-                if min_priority:
-                    if priority_order.get(rule_dict["priority"], 0) < priority_order.get(min_priority, 0):
-                        continue
-                
-                rules.append(rule_dict)
-            
-            logger.info(
-                "Retrieved active rules",
-                user_id=user_id,
-                count=len(rules),
-                context=context
-            )
-            
-            return rules
+        cache_key = (user_id, context, min_priority)
+        cached = self._rules_cache.get(cache_key)
+        if cached is not None:
+            return [dict(rule) for rule in cached]
+        
+        # Build query based on filters
+        query = """
+            MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
+            WHERE r.active = true
+        """
+        
+        params = {"user_id": user_id}
+        
+        # Context filter
+        if context:
+            query += " AND (r.context = $context OR r.context = 'all')"
+            params["context"] = context
+        
+        # Priority filter, solved server-side
+        if min_priority in PRIORITY_LEVEL:
+            query += " AND r.priority IN $allowed_priorities"
+            params["allowed_priorities"] = [
+                priority
+                for priority, level in PRIORITY_LEVEL.items()
+                if level >= PRIORITY_LEVEL[min_priority]
+            ]
+        
+        query += """
+            RETURN r {.rule_id, .rule, .priority, .context, .created_at, .metadata} as r
+            ORDER BY r.priority DESC, r.created_at DESC
+        """
+        
+        rules = [row["r"] for row in await self._run("read", query, **params)]
+        
+        for rule_dict in rules:
+            rule_dict["_prio"] = PRIORITY_RANK.get(rule_dict["priority"], 2)
+        
+        self._rules_cache.set(cache_key, rules)
+        
+        logger.info(
+            "Retrieved active rules",
+            user_id=user_id,
+            count=len(rules),
+            context=context
+        )
+        
+        return [dict(rule) for rule in rules]
     
-    def update_rule(
+    async def update_rule(
         self,
         rule_id: str,
         updates: Dict
@@ -199,31 +276,27 @@ class UserRuleSystem:
         
         # Filter out non-allowed fields
         safe_updates = {k: v for k, v in updates.items() if k in allowed_fields}
-        safe_updates["updated_at"] = datetime.now().isoformat()
         
-        with self.driver.session() as session:
-            # Build SET clause dynamically
-            set_clauses = [f"r.{key} = ${key}" for key in safe_updates.keys()]
-            set_clause = ", ".join(set_clauses)
-            
-            query = f"""
-                MATCH (r:UserRule {{rule_id: $rule_id}})
-                SET {set_clause}
-                RETURN r.rule_id as rule_id
-            """
-            
-            result = session.run(query, rule_id=rule_id, **safe_updates)
-            
-            success = result.single() is not None
-            
-            if success:
-                logger.info("Rule updated", rule_id=rule_id, updates=safe_updates)
-            else:
-                logger.warning("Rule not found for update", rule_id=rule_id)
-            
-            return success
+        # One fixed statement for every field combination, so the server
+        # plans it once; += only touches the keys present in the map
+        rows = await self._run("write", """
+            MATCH (r:UserRule {rule_id: $rule_id})
+            SET r += $updates, r.updated_at = datetime()
+            RETURN r.rule_id as rule_id
+        """, rule_id=rule_id, updates=safe_updates)
+        
+        success = bool(rows)
+        
+        if success:
+            # The owning user isn't known here, so drop every entry
+            self._invalidate()
+            logger.info("Rule updated", rule_id=rule_id, updates=safe_updates)
+        else:
+            logger.warning("Rule not found for update", rule_id=rule_id)
+        
+        return success
     
-    def delete_rule(self, rule_id: str) -> bool:
+    async def delete_rule(self, rule_id: str) -> bool:
         """
         Delete a rule (soft delete by deactivating).
         
@@ -234,9 +307,9 @@ class UserRuleSystem:
             True if successful
         """
         
-        return self.update_rule(rule_id, {"active": False})
+        return await self.update_rule(rule_id, {"active": False})
     
-    def check_conflicts(
+    async def check_conflicts(
         self,
         user_id: str,
         user_request: str,
@@ -256,30 +329,35 @@ class UserRuleSystem:
             List of conflicting rules (empty if no conflicts)
         """
         
-        # Get all active rules for this context
-        rules = self.get_active_rules(user_id, context)
+        # Active rules for this context and their keyword automaton; both
+        # are reused until a rule write invalidates them
+        cache_key = (user_id, context)
+        cached = self._conflict_cache.get(cache_key)
+        if cached is None:
+            rules = await self.get_active_rules(user_id, context)
+            cached = (rules, self._build_conflict_automaton(rules))
+            self._conflict_cache.set(cache_key, cached)
+        rules, automaton = cached
         
         conflicts = []
         
         # Simple keyword-based conflict detection
         # (In production, this would use LLM for semantic matching)
-        for rule in rules:
-            rule_text = rule["rule"].lower()
-            request_lower = user_request.lower()
+        if automaton is not None:
+            # One pass over the request finds every forbidden keyword of
+            # every rule; per rule keep the first keyword in rule order
+            first_hit = {}
+            for _, owners in automaton.iter(user_request.lower()):
+                for rule_index, keyword_index, keyword in owners:
+                    best = first_hit.get(rule_index)
+                    if best is None or keyword_index < best[0]:
+                        first_hit[rule_index] = (keyword_index, keyword)
             
-            # Extract "never" or "always" directives from rule
-            if "never" in rule_text:
-                # Extract what should never happen
-                forbidden_keywords = self._extract_keywords(rule_text, "never")
-                
-                # Check if request contains forbidden keywords
-                for keyword in forbidden_keywords:
-                    if keyword in request_lower:
-                        conflicts.append({
-                            **rule,
-                            "conflict_reason": f"Request contains forbidden keyword: '{keyword}'"
-                        })
-                        break
+            for rule_index in sorted(first_hit):
+                conflicts.append({
+                    **rules[rule_index],
+                    "conflict_reason": f"Request contains forbidden keyword: '{first_hit[rule_index][1]}'"
+                })
         
         if conflicts:
             logger.info(
@@ -290,6 +368,36 @@ class UserRuleSystem:
         
         return conflicts
     
+    def _build_conflict_automaton(self, rules: List[Dict]) -> Optional[ahocorasick.Automaton]:
+        """
+        Index the forbidden keywords of every "never" rule.
+        
+        Each keyword maps to the (rule_index, keyword_index, keyword)
+        entries that use it. Returns None when no rule has keywords.
+        """
+        
+        owners = {}
+        for rule_index, rule in enumerate(rules):
+            rule_text = rule["rule"].lower()
+            
+            # Extract "never" or "always" directives from rule
+            if "never" in rule_text:
+                # Extract what should never happen
+                forbidden_keywords = self._extract_keywords(rule_text, "never")
+                for keyword_index, keyword in enumerate(forbidden_keywords):
+                    owners.setdefault(keyword, []).append(
+                        (rule_index, keyword_index, keyword)
+                    )
+        
+        if not owners:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, entries in owners.items():
+            automaton.add_word(keyword, tuple(entries))
+        automaton.make_automaton()
+        return automaton
+    
     def _extract_keywords(self, rule_text: str, directive: str) -> List[str]:
         """
         Extract keywords from rule text.
@@ -313,92 +421,107 @@ class UserRuleSystem:
         except ValueError:
             return []
     
-    def get_rule_statistics(self, user_id: str) -> Dict:
+    async def get_rule_statistics(self, user_id: str) -> Dict:
         """
         Get statistics about user's rule system.
         
         Useful for transparency and debugging.
         """
         
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
-                RETURN 
-                    count(r) as total_rules,
-                    sum(CASE WHEN r.active = true THEN 1 ELSE 0 END) as active_rules,
-                    collect(DISTINCT r.context) as contexts,
-                    collect(DISTINCT r.priority) as priorities
-            """, user_id=user_id)
-            
-            record = result.single()
-            
-            if record:
-                return {
-                    "total_rules": record["total_rules"],
-                    "active_rules": record["active_rules"],
-                    "contexts": record["contexts"],
-                    "priorities": record["priorities"]
-                }
-            else:
-                return {
-                    "total_rules": 0,
-                    "active_rules": 0,
-                    "contexts": [],
-                    "priorities": []
-                }
+        rows = await self._run("read", """
+            MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
+            RETURN 
+                count(r) as total_rules,
+                count(CASE WHEN r.active THEN 1 END) as active_rules,
+                collect(DISTINCT r.context) as contexts,
+                collect(DISTINCT r.priority) as priorities
+        """, user_id=user_id)
+        
+        if rows:
+            return rows[0]
+        else:
+            return {
+                "total_rules": 0,
+                "active_rules": 0,
+                "contexts": [],
+                "priorities": []
+            }
     
-    def export_rules(self, user_id: str) -> List[Dict]:
+    async def export_rules(self, user_id: str) -> List[Dict]:
         """
         Export all rules for backup/portability.
         
         Gives users full ownership of their rule set.
         """
         
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
-                RETURN r
-                ORDER BY r.created_at
-            """, user_id=user_id)
-            
-            rules = []
-            for record in result:
-                rule_node = record["r"]
-                rules.append(dict(rule_node))
-            
-            logger.info(
-                "Rules exported",
-                user_id=user_id,
-                count=len(rules)
-            )
-            
-            return rules
+        rows = await self._run("read", """
+            MATCH (u:User {id: $user_id})-[:HAS_RULE]->(r:UserRule)
+            RETURN r {.*} as r
+            ORDER BY r.created_at
+        """, user_id=user_id)
+        
+        # All properties (user_defined marks seeded system rules), as plain
+        # dicts without node identity
+        rules = [row["r"] for row in rows]
+        
+        logger.info(
+            "Rules exported",
+            user_id=user_id,
+            count=len(rules)
+        )
+        
+        return rules
     
-    def import_rules(self, user_id: str, rules: List[Dict]) -> int:
+    async def import_rules(self, user_id: str, rules: List[Dict]) -> int:
         """
         Import rules from backup.
         
         Allows users to restore or transfer their rule set.
         """
         
-        imported = 0
-        
-        for rule in rules:
-            try:
-                self.create_rule(
-                    user_id=user_id,
-                    rule_text=rule.get("rule"),
-                    priority=rule.get("priority", "normal"),
-                    context=rule.get("context", "all"),
-                    metadata=rule.get("metadata", {})
-                )
-                imported += 1
-            except Exception as e:
-                logger.error(
-                    "Failed to import rule",
-                    rule=rule,
-                    error=str(e)
-                )
+        # One statement creates every rule, so the import is a single
+        # transaction and round trip; the batch commits or fails as a whole
+        payload = [
+            {
+                "rule_id": _new_rule_id(),
+                "rule": rule.get("rule"),
+                "priority": rule.get("priority", "normal"),
+                "context": rule.get("context", "all"),
+                "metadata": rule.get("metadata", {})
+            }
+            for rule in rules
+        ]
+        
+        try:
+            rows = await self._run("write", """
+                MATCH (u:User {id: $user_id})
+                UNWIND $rules AS rule
+                CREATE (r:UserRule {
+                    rule_id: rule.rule_id,
+                    rule: rule.rule,
+                    priority: rule.priority,
+                    context: rule.context,
+                    active: true,
+                    user_defined: true,
+                    created_at: datetime(),
+                    updated_at: datetime(),
+                    metadata: rule.metadata
+                })
+                CREATE (u)-[:HAS_RULE]->(r)
+                RETURN count(r) as imported
+            """, user_id=user_id, rules=payload)
+            imported = rows[0]["imported"] if rows else 0
+        except Exception as e:
+            logger.error(
+                "Failed to import rules",
+                user_id=user_id,
+                count=len(rules),
+                error=str(e)
+            )
+            imported = 0
+        
+        if imported:
+            self._invalidate(user_id)
         
         logger.info(
             "Rules imported",
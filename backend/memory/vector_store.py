@@ -3,7 +3,9 @@ Vector Store Implementation for NIRE
 Handles semantic memory storage and retrieval using ChromaDB.
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
+from collections import Counter
+from pathlib import Path
 import chromadb
 from chromadb.config import Settings
 from datetime import datetime
@@ -26,6 +28,14 @@ class VectorStore:
     - Memory persistence
     """
     
+    # Marker file in the Chroma directory: present once every stored memory
+    # carries the numeric "ts_epoch" metadata field (see _migrate_ordering)
+    ORDERING_MARKER = ".nire_ts_epoch_v1"
+    
+    # First time window get_recent_memories asks Chroma for; widened 4x
+    # per round until it holds enough memories
+    RECENT_WINDOW_MS = 24 * 60 * 60 * 1000
+    
     def __init__(self):
         """Initialize ChromaDB persistent client."""
         logger.info("Initializing VectorStore")
@@ -44,12 +54,81 @@ class VectorStore:
             metadata={"hnsw:space": "cosine"}
         )
         
+        # Category histogram for get_statistics: seeded by a scan on first
+        # use, then kept current by this instance's writes (None = unseeded)
+        self._category_counts: Optional[Counter] = None
+        
+        self._migrate_ordering()
+        
         logger.info(
             "VectorStore initialized",
             collection=self.collection.name,
             count=self.collection.count()
         )
     
+    def _count_categories(self, metadatas: Iterable[Optional[Dict]], delta: int = 1):
+        """Add delta to the category counts of the given metadata records."""
+        if self._category_counts is None:
+            return
+        
+        for metadata in metadatas:
+            category = (metadata or {}).get('category', 'unknown')
+            self._category_counts[category] += delta
+            if self._category_counts[category] <= 0:
+                del self._category_counts[category]
+    
+    @staticmethod
+    def _epoch_ms(timestamp: Optional[str], fallback: Optional[datetime] = None) -> int:
+        """Convert an ISO timestamp to epoch milliseconds (fallback, default now, if unparsable)."""
+        try:
+            moment = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            moment = fallback or datetime.now()
+        return int(moment.timestamp() * 1000)
+    
+    def _stamp(self, metadata: Dict):
+        """Fill in the default and ordering fields of a new memory's metadata."""
+        metadata.setdefault("timestamp", datetime.now().isoformat())
+        metadata.setdefault("category", "general")
+        # Wall-clock milliseconds compare across processes, unlike a local
+        # counter; ties are broken by memory id when ordering
+        metadata["ts_epoch"] = self._epoch_ms(metadata["timestamp"])
+    
+    def _migrate_ordering(self):
+        """
+        Give memories stored before ts_epoch existed that field (runs once).
+        
+        The marker file makes later startups skip the full metadata scan.
+        Concurrent first starts may both migrate, which is harmless: only
+        records still missing the field are rewritten.
+        """
+        marker = Path(settings.CHROMA_PERSIST_DIRECTORY) / self.ORDERING_MARKER
+        if marker.exists():
+            return
+        
+        existing = self.collection.get(include=["metadatas"])
+        
+        legacy_ids = []
+        updated = []
+        for memory_id, metadata in zip(existing['ids'], existing['metadatas'] or []):
+            if metadata and "ts_epoch" in metadata:
+                continue
+            metadata = dict(metadata or {})
+            # Unknown timestamps sort as oldest
+            metadata["ts_epoch"] = self._epoch_ms(
+                metadata.get("timestamp"),
+                fallback=datetime.fromtimestamp(0)
+            )
+            legacy_ids.append(memory_id)
+            updated.append(metadata)
+        
+        if legacy_ids:
+            self.collection.update(ids=legacy_ids, metadatas=updated)
+        
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        logger.info("Migrated memory ordering fields", count=len(legacy_ids))
+    
     async def add_memory(
         self,
         text: str,
@@ -77,8 +156,7 @@ class VectorStore:
         if metadata is None:
             metadata = {}
         
-        metadata.setdefault("timestamp", datetime.now().isoformat())
-        metadata.setdefault("category", "general")
+        self._stamp(metadata)
         
         try:
             self.collection.add(
@@ -87,6 +165,7 @@ class VectorStore:
                 metadatas=[metadata],
                 ids=[memory_id]
             )
+            self._count_categories([metadata])
             
             logger.info(
                 "Memory stored",
@@ -123,15 +202,14 @@ class VectorStore:
         """
         
         if metadatas is None:
-            metadatas = [{}] * len(texts)
+            metadatas = [{} for _ in texts]
         
         # Generate IDs
         memory_ids = [f"mem_{uuid.uuid4().hex[:16]}" for _ in texts]
         
-        # Ensure all metadata has timestamp
+        # Ensure all metadata has timestamp and insertion order
         for metadata in metadatas:
-            metadata.setdefault("timestamp", datetime.now().isoformat())
-            metadata.setdefault("category", "general")
+            self._stamp(metadata)
         
         try:
             self.collection.add(
@@ -140,6 +218,7 @@ class VectorStore:
                 metadatas=metadatas,
                 ids=memory_ids
             )
+            self._count_categories(metadatas)
             
             logger.info(
                 "Batch memories stored",
@@ -191,15 +270,21 @@ class VectorStore:
             # Format results
             memories = []
             if results['ids'] and len(results['ids'][0]) > 0:
-                for i in range(len(results['ids'][0])):
-                    memory = {
-                        "id": results['ids'][0][i],
-                        "content": results['documents'][0][i],
-                        "metadata": results['metadatas'][0][i],
-                        "distance": results['distances'][0][i],
-                        "similarity": 1 - results['distances'][0][i]  # Convert distance to similarity
+                memories = [
+                    {
+                        "id": memory_id,
+                        "content": document,
+                        "metadata": metadata,
+                        "distance": distance,
+                        "similarity": 1 - distance  # Convert distance to similarity
                     }
-                    memories.append(memory)
+                    for memory_id, document, metadata, distance in zip(
+                        results['ids'][0],
+                        results['documents'][0],
+                        results['metadatas'][0],
+                        results['distances'][0]
+                    )
+                ]
             
             logger.info(
                 "Similarity search completed",
@@ -296,6 +381,9 @@ class VectorStore:
                 update_kwargs["metadatas"] = [updated_metadata]
             
             self.collection.update(**update_kwargs)
+            if "metadatas" in update_kwargs:
+                self._count_categories([existing['metadata']], -1)
+                self._count_categories(update_kwargs["metadatas"])
             
             logger.info("Memory updated", memory_id=memory_id)
             return True
@@ -320,7 +408,9 @@ class VectorStore:
         """
         
         try:
+            existing = self.collection.get(ids=[memory_id], include=["metadatas"])
             self.collection.delete(ids=[memory_id])
+            self._count_categories(existing['metadatas'] or [], -1)
             
             logger.info("Memory deleted", memory_id=memory_id)
             return True
@@ -351,13 +441,14 @@ class VectorStore:
             # Get IDs matching filter
             results = self.collection.get(
                 where=filter_metadata,
-                include=[]
+                include=["metadatas"]
             )
             
             ids_to_delete = results['ids']
             
             if ids_to_delete:
                 self.collection.delete(ids=ids_to_delete)
+                self._count_categories(results['metadatas'] or [], -1)
                 
                 logger.info(
                     "Batch deletion completed",
@@ -400,13 +491,12 @@ class VectorStore:
             
             memories = []
             if results['ids']:
-                for i in range(len(results['ids'])):
-                    memory = {
-                        "id": results['ids'][i],
-                        "content": results['documents'][i],
-                        "metadata": results['metadatas'][i]
-                    }
-                    memories.append(memory)
+                memories = [
+                    {"id": memory_id, "content": document, "metadata": metadata}
+                    for memory_id, document, metadata in zip(
+                        results['ids'], results['documents'], results['metadatas']
+                    )
+                ]
             
             logger.info(
                 "Retrieved memories by category",
@@ -441,33 +531,46 @@ class VectorStore:
         """
         
         try:
-            # Build filter
-            where_filter = {}
-            if since:
-                where_filter["timestamp"] = {"$gte": since}
-            
-            # Get memories
-            results = self.collection.get(
-                where=where_filter if where_filter else None,
-                limit=limit,
-                include=["documents", "metadatas"]
+            # Filter server-side on ts_epoch, so Chroma returns (close to)
+            # just the rows we want instead of `limit` arbitrary ones
+            floor = (
+                int(datetime.fromisoformat(since).timestamp() * 1000) if since else None
             )
+            now = self._epoch_ms(None)
+            total = self.collection.count()
+            
+            # Start with the last day and widen until the window holds
+            # `limit` memories, reaches `since`, or covers all of time
+            window = self.RECENT_WINDOW_MS
+            while True:
+                lower = now - window
+                if floor is not None:
+                    lower = max(lower, floor)
+                results = self.collection.get(
+                    where={"ts_epoch": {"$gte": lower}},
+                    include=["documents", "metadatas"]
+                )
+                found = len(results['ids'])
+                if found >= limit or found >= total or lower == floor or lower <= 0:
+                    break
+                window *= 4
             
             memories = []
             if results['ids']:
-                for i in range(len(results['ids'])):
-                    memory = {
-                        "id": results['ids'][i],
-                        "content": results['documents'][i],
-                        "metadata": results['metadatas'][i]
-                    }
-                    memories.append(memory)
-            
-            # Sort by timestamp (most recent first)
+                memories = [
+                    {"id": memory_id, "content": document, "metadata": metadata}
+                    for memory_id, document, metadata in zip(
+                        results['ids'], results['documents'], results['metadatas']
+                    )
+                ]
+            
+            # Chroma returns rows unordered; order the fetched window
+            # (most recent first, id breaking same-millisecond ties)
             memories.sort(
-                key=lambda x: x['metadata'].get('timestamp', ''),
+                key=lambda x: (x['metadata'].get('ts_epoch', 0), x['id']),
                 reverse=True
             )
+            memories = memories[:limit]
             
             logger.info(
                 "Retrieved recent memories",
@@ -488,27 +591,30 @@ class VectorStore:
         """
         Get statistics about the vector store.
         
+        Category counts are maintained in process, so they are exact only
+        while this instance is the collection's single writer. If another
+        writer changes the number of memories, the totals stop matching
+        and the counts are rebuilt from a full scan. Category changes by
+        another writer that keep the total unchanged are not seen.
+        
         Returns:
             Dict with statistics
         """
         
         total_count = self.collection.count()
         
-        # Get category distribution
-        all_memories = self.collection.get(
-            limit=10000,  # Reasonable limit for stats
-            include=["metadatas"]
-        )
-        
-        categories = {}
-        if all_memories['metadatas']:
-            for metadata in all_memories['metadatas']:
-                cat = metadata.get('category', 'unknown')
-                categories[cat] = categories.get(cat, 0) + 1
+        if (
+            self._category_counts is None
+            or sum(self._category_counts.values()) != total_count
+        ):
+            self._category_counts = Counter()
+            self._count_categories(
+                self.collection.get(include=["metadatas"])['metadatas'] or []
+            )
         
         return {
             "total_memories": total_count,
-            "categories": categories,
+            "categories": dict(self._category_counts),
             "collection_name": self.collection.name
         }
     
@@ -528,6 +634,7 @@ class VectorStore:
                 name="nire_memories",
                 metadata={"hnsw:space": "cosine"}
             )
+            self._category_counts = Counter()
             
             logger.warning("All memories cleared")
             return True
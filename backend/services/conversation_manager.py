@@ -4,8 +4,10 @@ Orchestrates conversation with context, error handling, and performance tracking
 """
 
 import asyncio
-from typing import AsyncGenerator, Dict
+from collections import deque
+from typing import AsyncGenerator, Dict, Optional
 from datetime import datetime
+from neo4j import AsyncDriver
 import structlog
 
 from backend.core.llm_engine import LLMEngine
@@ -19,19 +21,29 @@ logger = structlog.get_logger()
 
 class ConversationManager:
     
-    def __init__(self, neo4j_driver):
+    def __init__(self, graph_driver: Optional[AsyncDriver] = None):
         self.llm_engine = LLMEngine()
-        self.memory_controller = MemoryController(neo4j_driver, user_id="user_001")
-        self.rule_system = UserRuleSystem(neo4j_driver)
+        self.memory_controller = MemoryController(graph_driver, user_id="user_001")
+        # One rule system (and rule cache) shared with the memory controller
+        self.rule_system: UserRuleSystem = self.memory_controller.rule_system
         
         # New Services
         self.context_manager = ContextManager()
         self.error_handler = ErrorHandler()
         self.monitor = PerformanceMonitor()
         
-        self.history = []
+        # Bounded history: O(1) append with automatic eviction of old turns
+        self.history = deque(maxlen=20)
+        # Background memory writes, awaited by close() before the driver goes
+        self._store_tasks = set()
         logger.info("Conversation Manager (Enhanced) initialized")
     
+    async def close(self):
+        """Wait for pending memory writes, then release the memory controller."""
+        if self._store_tasks:
+            await asyncio.gather(*self._store_tasks)
+        await self.memory_controller.close()
+    
     async def process_message(
         self, 
         user_msg: str, 
@@ -48,7 +60,7 @@ class ConversationManager:
             ctx, conf = self.context_manager.detect_context(user_msg)
             context = ctx
             if conf > 0.5:
-                logger.info(f"Context auto-detected: {context} ({conf:.2f})")
+                logger.info("Context auto-detected", context=context, confidence=round(conf, 2))
 
         # 2. Retrieve Memory (Safe Retry)
         try:
@@ -66,7 +78,7 @@ class ConversationManager:
         # 3. Get Rules
         rules = []
         if check_rules:
-            rules = self.rule_system.get_active_rules("user_001", context=context)
+            rules = await self.rule_system.get_active_rules("user_001", context=context)
 
         # 4. Check Conflicts (Fix Async Loop)
         if mem_ctx.get("has_conflicts"):
@@ -86,7 +98,7 @@ class ConversationManager:
         try:
             # Convert rule dicts to expected format if needed
             formatted_rules = [
-                {"rule": r["rule"], "priority": r["priority"], "context": r["context"]}
+                {"rule": r["rule"], "priority": r["priority"], "context": r["context"], "_prio": r["_prio"]}
                 for r in rules
             ]
             
@@ -104,7 +116,9 @@ class ConversationManager:
         self.monitor.stop("generation", token_count)
 
         # 6. Store Memory (Async & Safe)
-        asyncio.create_task(self._safe_store(user_msg, full_response, context))
+        store_task = asyncio.create_task(self._safe_store(user_msg, full_response, context))
+        self._store_tasks.add(store_task)
+        store_task.add_done_callback(self._store_tasks.discard)
         
         # Update History
         self._update_history(user_msg, full_response)
@@ -124,12 +138,11 @@ class ConversationManager:
     def _update_history(self, user, assistant):
         self.history.append({"role": "user", "content": user})
         self.history.append({"role": "assistant", "content": assistant})
-        if len(self.history) > 20: self.history = self.history[-20:]
 
     async def get_conversation_stats(self) -> Dict:
-        memory_stats = self.memory_controller.get_statistics()
+        memory_stats = await self.memory_controller.get_statistics()
         llm_info = self.llm_engine.get_model_info()
-        rule_stats = self.rule_system.get_rule_statistics("user_001")
+        rule_stats = await self.rule_system.get_rule_statistics("user_001")
         
         return {
             "history_len": len(self.history),
@@ -0,0 +1,155 @@
+"""
+In-Process Caches
+Small bounded caches for read-mostly database lookups.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a fixed time-to-live.
+    
+    Expired entries are dropped lazily on lookup; the least recently
+    used entry is evicted when maxsize is exceeded. Safe to share
+    between threads.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Seconds an entry stays valid after it is set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry (for invalidation after writes)."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+    
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every entry whose key matches predicate."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LRUKCache:
+    """
+    LRU-K cache: evicts the entry whose K-th most recent access is oldest.
+    
+    Entries accessed fewer than K times are evicted first (least recently
+    used among them), so a burst of one-off lookups cannot push out the
+    repeatedly used working set. Eviction scans the entries, which is
+    fine for the small capacities used here. Safe to share between threads.
+    """
+    
+    def __init__(self, capacity: int, k: int = 2):
+        """
+        Args:
+            capacity: Maximum number of entries
+            k: Accesses tracked per entry
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self.k = k
+        self._data: Dict[Hashable, Any] = {}
+        self._history: Dict[Hashable, deque] = {}
+        self._clock = itertools.count()
+        self._lock = threading.Lock()
+    
+    def _touch(self, key: Hashable) -> None:
+        history = self._history.get(key)
+        if history is None:
+            history = self._history[key] = deque(maxlen=self.k)
+        history.append(next(self._clock))
+    
+    def _evict(self) -> None:
+        k = self.k
+        
+        def backward_distance(key):
+            history = self._history[key]
+            if len(history) < k:
+                return (0, history[-1])
+            return (1, history[0])
+        
+        victim = min(self._data, key=backward_distance)
+        del self._data[victim]
+        del self._history[victim]
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (counting the access), or default."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._touch(key)
+            return self._data[key]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting by backward K-distance if full."""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.capacity:
+                self._evict()
+            self._data[key] = value
+            self._touch(key)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry (for invalidation after writes)."""
+        with self._lock:
+            self._history.pop(key, None)
+            return self._data.pop(key, default)
+    
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every entry whose key matches predicate."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                del self._history[key]
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+            self._history.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
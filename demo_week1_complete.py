@@ -31,10 +31,10 @@ async def demo():
     """Run interactive demo."""
     
     from services.conversation_manager import ConversationManager
-    from neo4j import GraphDatabase
+    from neo4j import AsyncGraphDatabase
     
     # Connect to Neo4j
-    driver = GraphDatabase.driver(
+    driver = AsyncGraphDatabase.driver(
         os.getenv("NEO4J_URI"),
         auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
     )
@@ -168,7 +168,8 @@ async def demo():
     print()
     
     # Cleanup
-    driver.close()
+    await manager.close()
+    await driver.close()
     
     # Final Summary
     print("=" * 70)
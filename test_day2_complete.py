@@ -3,9 +3,10 @@ Day 2 Complete Integration Test
 Tests all databases + unrestricted configuration
 """
 
+import asyncio
 import os
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 import redis
 import chromadb
 import sys
@@ -97,19 +98,21 @@ try:
     sys.path.append('backend')
     from memory.user_rule_system import UserRuleSystem
     
-    driver = GraphDatabase.driver(
-        os.getenv("NEO4J_URI"),
-        auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
-    )
+    async def rule_stats():
+        driver = AsyncGraphDatabase.driver(
+            os.getenv("NEO4J_URI"),
+            auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+        )
+        try:
+            return await UserRuleSystem(driver).get_rule_statistics("user_001")
+        finally:
+            await driver.close()
     
-    rule_system = UserRuleSystem(driver)
-    stats = rule_system.get_rule_statistics("user_001")
+    stats = asyncio.run(rule_stats())
     
     print(f"✓ Rule system initialized")
     print(f"✓ Total rules: {stats['total_rules']}")
     print(f"✓ Active rules: {stats['active_rules']}")
-    
-    driver.close()
     rules_ok = True
 except Exception as e:
     print(f"✗ Rule system failed: {str(e)}")
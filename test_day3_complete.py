@@ -7,7 +7,7 @@ import os
 import sys
 import asyncio
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 
 # Add backend to path
 sys.path.append('backend')
@@ -116,7 +116,7 @@ async def test_graph_store():
     try:
         from memory.graph_store import GraphStore
         
-        driver = GraphDatabase.driver(
+        driver = AsyncGraphDatabase.driver(
             os.getenv("NEO4J_URI"),
             auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
         )
@@ -173,10 +173,10 @@ async def test_graph_store():
         print(f"✓ Preferences retrieved: {len(prefs)}")
         
         # Test statistics
-        stats = graph_store.get_statistics("user_001")
+        stats = await graph_store.get_statistics("user_001")
         print(f"✓ Graph stats: {stats}")
         
-        driver.close()
+        await driver.close()
         return True
         
     except Exception as e:
@@ -193,7 +193,7 @@ async def test_memory_controller():
     try:
         from memory.memory_controller import MemoryController
         
-        driver = GraphDatabase.driver(
+        driver = AsyncGraphDatabase.driver(
             os.getenv("NEO4J_URI"),
             auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
         )
@@ -226,13 +226,14 @@ async def test_memory_controller():
             print(f"✓ Top memory: {context['memories'][0]['content'][:50]}...")
         
         # Test statistics
-        stats = controller.get_statistics()
+        stats = await controller.get_statistics()
         print(f"✓ Statistics retrieved:")
         print(f"  - Vector memories: {stats['vector_store']['total_memories']}")
         print(f"  - Graph facts: {stats['graph_store']['facts']}")
         print(f"  - User rules: {stats['user_rules']['total_rules']}")
         
-        driver.close()
+        await controller.close()
+        await driver.close()
         return True
         
     except Exception as e:
@@ -250,7 +251,7 @@ async def test_unrestricted_integration():
         from memory.memory_controller import MemoryController
         from core.unrestricted_prompts import UnrestrictedPromptTemplates
         
-        driver = GraphDatabase.driver(
+        driver = AsyncGraphDatabase.driver(
             os.getenv("NEO4J_URI"),
             auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
         )
@@ -287,7 +288,8 @@ async def test_unrestricted_integration():
             status = "✓" if check else "✗"
             print(f"{status} Contains: {desc}")
         
-        driver.close()
+        await controller.close()
+        await driver.close()
         return all(check for check, _ in checks)
         
     except Exception as e:
@@ -5,7 +5,7 @@ Tests LLM engine with memory system and unrestricted operation.
 
 import asyncio
 import time
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 from dotenv import load_dotenv
 import os
 
@@ -18,6 +18,7 @@ async def test_llm_loading():
     from backend.core.llm_engine import LLMEngine
     
     engine = LLMEngine()
+    await engine.preload()
     info = engine.get_model_info()
     
     print(f"✓ Models loaded: {list(info.keys())}")
@@ -96,9 +97,6 @@ async def test_generation(engine):
     """Test actual generation."""
     print("\n=== Test 4: Generation Test ===")
     
-    # Set current model
-    engine.current_model = "phi3"
-    
     prompt = "Hello! Please respond with a short greeting."
     
     print(f"Prompt: {prompt}")
@@ -110,6 +108,7 @@ async def test_generation(engine):
     token_count = 0
     
     async for token in engine.generate(
+        model_key="phi3",
         prompt=prompt,
         max_tokens=50,
         temperature=0.7,
@@ -135,7 +134,7 @@ async def test_conversation_flow():
     print("\n=== Test 5: Full Conversation Flow ===")
     
     # Connect to Neo4j
-    driver = GraphDatabase.driver(
+    driver = AsyncGraphDatabase.driver(
         os.getenv("NEO4J_URI"),
         auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
     )
@@ -183,7 +182,8 @@ async def test_conversation_flow():
     print(f"✓ Memory stats: {stats['memory_stats']['vector_store']['total_memories']} memories")
     print(f"✓ Active rules: {stats['active_rules']['total_rules']}")
     
-    driver.close()
+    await manager.close()
+    await driver.close()
     print("\n✓ Full conversation flow complete!")
 
 async def test_performance_benchmark():
@@ -195,7 +195,6 @@ async def test_performance_benchmark():
     engine = LLMEngine()
     
     # Test Phi-3 performance
-    engine.current_model = "phi3"
     prompt_phi = "Count from 1 to 10 and explain each number briefly."
     
     print("Testing Phi-3.5 performance...")
@@ -203,7 +202,7 @@ async def test_performance_benchmark():
     tokens_phi = 0
     first_token_time = None
     
-    async for token in engine.generate(prompt_phi, max_tokens=200):
+    async for token in engine.generate("phi3", prompt_phi, max_tokens=200):
         if first_token_time is None:
             first_token_time = time.time()
         tokens_phi += 1
@@ -216,7 +215,6 @@ async def test_performance_benchmark():
     print(f"✓ Phi-3.5 Throughput: {tokens_phi/phi_time:.1f} tokens/sec")
     
     # Test Mistral performance
-    engine.current_model = "mistral"
     prompt_mistral = "Explain the concept of recursion in computer science with examples."
     
     print("\nTesting Mistral-7B performance...")
@@ -224,7 +222,7 @@ async def test_performance_benchmark():
     tokens_mistral = 0
     first_token_time = None
     
-    async for token in engine.generate(prompt_mistral, max_tokens=200):
+    async for token in engine.generate("mistral", prompt_mistral, max_tokens=200):
         if first_token_time is None:
             first_token_time = time.time()
         tokens_mistral += 1
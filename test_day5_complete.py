@@ -5,7 +5,7 @@ import asyncio
 import sys
 import os
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
 
 sys.path.append('backend')
 load_dotenv()
@@ -18,7 +18,7 @@ async def main():
     try:
         # 1. Setup
         print("\n--- Setup ---")
-        driver = GraphDatabase.driver(
+        driver = AsyncGraphDatabase.driver(
             os.getenv("NEO4J_URI"),
             auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
         )
@@ -50,7 +50,8 @@ async def main():
         print("Check logs for 'tokens_per_sec' metrics.")
         print("✓ Performance Monitor Active")
 
-        driver.close()
+        await manager.close()
+        await driver.close()
         
         print("\n" + "="*60)
         print("🎉 WEEK 1 COMPLETE! SYSTEM OPERATIONAL")
@@ -0,0 +1,24 @@
+"""
+Shared test setup.
+
+backend.config validates the environment at import time, so the required
+settings get placeholder values here (real values from the environment
+win). Data and log directories go to a temporary directory.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="nire-tests-")
+
+for _name, _value in {
+    "LLM_MODEL_PRIMARY": "models/primary.gguf",
+    "LLM_MODEL_SECONDARY": "models/secondary.gguf",
+    "NEO4J_URI": "bolt://localhost:7687",
+    "NEO4J_USER": "neo4j",
+    "NEO4J_PASSWORD": "test",
+    "CHROMA_PERSIST_DIRECTORY": os.path.join(_TMP, "chroma"),
+    "DATA_DIR": _TMP,
+    "LOGS_DIR": os.path.join(_TMP, "logs"),
+}.items():
+    os.environ.setdefault(_name, _value)
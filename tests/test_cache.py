@@ -0,0 +1,196 @@
+"""
+Tests for the in-process caches in backend.utils.cache.
+"""
+
+import threading
+
+import pytest
+
+from backend.utils import cache as cache_module
+from backend.utils.cache import LRUKCache, TTLCache
+
+
+class _Clock:
+    """Manually advanced stand-in for time.monotonic."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_ttl_entry_expires(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    
+    clock.now += 9.9
+    assert cache.get("a") == 1
+    
+    clock.now += 0.1
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_ttl_set_refreshes_expiry(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    clock.now += 8
+    cache.set("a", 2)
+    clock.now += 8
+    
+    assert cache.get("a") == 2
+
+
+def test_ttl_get_does_not_extend_expiry(clock):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    clock.now += 5
+    cache.get("a")
+    clock.now += 5
+    
+    assert cache.get("a") is None
+
+
+def test_ttl_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_invalidation(clock):
+    cache = TTLCache(maxsize=8, ttl=10)
+    for user in ("u1", "u2"):
+        for n in range(2):
+            cache.set((user, n), n)
+    
+    assert cache.pop(("u1", 0)) == 0
+    assert cache.pop(("u1", 0), "gone") == "gone"
+    
+    cache.discard_where(lambda key: key[0] == "u2")
+    assert len(cache) == 1
+    assert cache.get(("u1", 1)) == 1
+    
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lruk_evicts_single_access_entries_first():
+    cache = LRUKCache(capacity=3, k=2)
+    cache.set("hot", 1)
+    cache.get("hot")
+    cache.set("once_a", 2)
+    cache.set("once_b", 3)
+    
+    cache.set("new", 4)
+    
+    # once_a has fewer than k accesses and the oldest last access
+    assert cache.get("once_a") is None
+    assert cache.get("hot") == 1
+    assert cache.get("once_b") == 3
+
+
+def test_lruk_scan_does_not_evict_working_set():
+    cache = LRUKCache(capacity=3, k=2)
+    for key in ("a", "b"):
+        cache.set(key, key)
+        cache.get(key)
+    
+    for n in range(10):
+        cache.set(("scan", n), n)
+    
+    assert cache.get("a") == "a"
+    assert cache.get("b") == "b"
+    assert len(cache) == 3
+
+
+def test_lruk_evicts_oldest_kth_access():
+    cache = LRUKCache(capacity=2, k=2)
+    cache.set("a", 1)   # t0
+    cache.set("b", 2)   # t1
+    cache.get("a")      # t2 -> a: (t0, t2)
+    cache.get("b")      # t3 -> b: (t1, t3)
+    cache.get("b")      # t4 -> b: (t3, t4)
+    cache.get("a")      # t5 -> a: (t2, t5)
+    
+    # a was touched last, but its 2nd most recent access (t2) is older than b's (t3)
+    cache.set("c", 3)
+    
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_lruk_invalidation_resets_history():
+    cache = LRUKCache(capacity=2, k=2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.set("b", 2)
+    
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    
+    # a comes back with a single access, so it is evicted ahead of b
+    cache.set("a", 1)
+    cache.get("b")
+    cache.set("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    
+    cache.discard_where(lambda key: key in ("b", "c"))
+    assert len(cache) == 0
+    
+    cache.set("d", 4)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("d") is None
+
+
+@pytest.mark.parametrize("factory", [
+    lambda: TTLCache(maxsize=16, ttl=60),
+    lambda: LRUKCache(capacity=16, k=2),
+])
+def test_concurrent_access_stays_bounded(factory):
+    cache = factory()
+    errors = []
+    
+    def worker(offset):
+        try:
+            for n in range(2000):
+                key = (offset + n) % 40
+                if cache.get(key) is None:
+                    cache.set(key, key)
+                if n % 97 == 0:
+                    cache.pop(key)
+                if n % 331 == 0:
+                    cache.discard_where(lambda k: k % 7 == 0)
+        except Exception as exc:  # surfaced to the main thread below
+            errors.append(exc)
+    
+    threads = [threading.Thread(target=worker, args=(i * 13,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len(cache) <= 16
+
+
+@pytest.mark.parametrize("capacity", [0, -1])
+def test_lruk_rejects_non_positive_capacity(capacity):
+    with pytest.raises(ValueError):
+        LRUKCache(capacity=capacity)
@@ -0,0 +1,27 @@
+"""
+Tests for backend.config.
+"""
+
+import dataclasses
+
+import pytest
+
+from backend.config import Settings, _EnvSettings, get_settings, settings
+
+
+def test_settings_fields_match_env_schema():
+    dataclass_fields = {field.name: field.type for field in dataclasses.fields(Settings)}
+    schema_fields = {
+        name: field.annotation for name, field in _EnvSettings.model_fields.items()
+    }
+    
+    assert dataclass_fields == schema_fields
+
+
+def test_settings_is_frozen():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.LOG_LEVEL = "DEBUG"
+
+
+def test_get_settings_is_cached():
+    assert get_settings() is settings
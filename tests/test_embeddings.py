@@ -0,0 +1,151 @@
+"""
+Tests for backend.memory.embeddings that don't need the real model.
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from backend.memory import embeddings
+from backend.memory.embeddings import EmbeddingGenerator
+
+
+DIMENSION = 4
+
+
+class _FakeModel:
+    """Stands in for the SentenceTransformer returned by load_shared_model."""
+    
+    max_seq_length = 128
+    
+    def get_sentence_embedding_dimension(self):
+        return DIMENSION
+
+
+def _fake_encode(texts, **kwargs):
+    """Deterministic rows: the text length in every component."""
+    return np.array([[float(len(text))] * DIMENSION for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(embeddings, "load_shared_model", _FakeModel)
+    gen = EmbeddingGenerator(max_wait_ms=1.0)
+    gen._encode_blocking = _fake_encode
+    return gen
+
+
+@pytest.mark.asyncio
+async def test_aclose_stops_worker_and_generator_restarts(generator):
+    first = await generator.encode("abc", normalize=False, return_numpy=True)
+    worker = generator._batch_worker
+    
+    assert not worker.done()
+    
+    await generator.aclose()
+    
+    assert worker.cancelled()
+    assert generator._batch_worker is None
+    
+    second = await generator.encode("abcd", normalize=False, return_numpy=True)
+    
+    assert first.tolist() == [3.0] * DIMENSION
+    assert second.tolist() == [4.0] * DIMENSION
+    await generator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_in_flight_requests(generator):
+    started = threading.Event()
+    release = threading.Event()
+    
+    def blocking_encode(texts, **kwargs):
+        started.set()
+        release.wait(5)
+        return _fake_encode(texts)
+    
+    generator._encode_blocking = blocking_encode
+    request = asyncio.create_task(generator.encode("abc", normalize=False))
+    
+    while not started.is_set():
+        await asyncio.sleep(0.001)
+    
+    await generator.aclose()
+    release.set()
+    
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+
+@pytest.mark.asyncio
+async def test_aclose_without_worker_is_noop(generator):
+    await generator.aclose()
+    
+    assert generator._batch_worker is None
+
+
+def test_quantize_int8_dtypes_and_shapes():
+    rows = np.random.default_rng(0).normal(size=(5, 16)).astype(np.float32)
+    
+    codes, scales = embeddings.quantize_int8(rows)
+    
+    assert codes.dtype == np.int8
+    assert codes.shape == (5, 16)
+    assert scales.dtype == np.float32
+    assert scales.shape == (5,)
+    assert embeddings.dequantize_int8(codes, scales).dtype == np.float32
+
+
+def test_quantize_int8_uses_per_row_scale():
+    rows = np.array([
+        [0.5, -0.25, 0.125],
+        [-40.0, 10.0, 2.0],
+        [1e-4, -3e-5, 0.0],
+    ], dtype=np.float32)
+    
+    codes, scales = embeddings.quantize_int8(rows)
+    
+    np.testing.assert_allclose(scales, 127.0 / np.abs(rows).max(axis=1), rtol=1e-6)
+    # Every row's largest component uses the full int8 range
+    assert np.abs(codes.astype(np.int16)).max(axis=1).tolist() == [127, 127, 127]
+    assert codes[1, 0] == -127
+
+
+def test_quantize_int8_round_trip_error_bound():
+    rng = np.random.default_rng(1)
+    rows = rng.normal(scale=rng.uniform(0.01, 100, size=(64, 1)), size=(64, 384)).astype(np.float32)
+    
+    codes, scales = embeddings.quantize_int8(rows)
+    restored = embeddings.dequantize_int8(codes, scales)
+    
+    # Rounding to the nearest code is off by at most half a step (1 / scale)
+    bound = 0.5 / scales[:, None] * (1 + 1e-5)
+    assert np.all(np.abs(restored - rows) <= bound)
+
+
+def test_quantize_int8_zero_rows():
+    rows = np.array([[0.0, 0.0, 0.0], [3.0, 0.0, -1.5]], dtype=np.float32)
+    
+    codes, scales = embeddings.quantize_int8(rows)
+    
+    assert scales[0] == 1.0
+    assert codes[0].tolist() == [0, 0, 0]
+    assert np.all(np.isfinite(scales))
+    assert embeddings.dequantize_int8(codes, scales)[0].tolist() == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_encode_quantized_single_and_batch(generator):
+    code, scale = await generator.encode_quantized("abcd", normalize=False)
+    codes, scales = await generator.encode_quantized(["ab", "abcd"], normalize=False)
+    
+    assert code.dtype == np.int8
+    assert code.tolist() == [127] * DIMENSION
+    assert isinstance(scale, float)
+    assert scale == pytest.approx(127 / 4)
+    assert codes.shape == (2, DIMENSION)
+    np.testing.assert_allclose(scales, [127 / 2, 127 / 4], rtol=1e-6)
+    np.testing.assert_allclose(embeddings.dequantize_int8(codes, scales), [[2.0] * DIMENSION, [4.0] * DIMENSION])
+    await generator.aclose()
@@ -0,0 +1,48 @@
+"""
+Tests for MemoryController._extract_entity_names.
+"""
+
+import pytest
+
+
+def baseline_entity_names(text):
+    """The original split/strip/isupper heuristic."""
+    entities = []
+    for word in text.split():
+        word = word.strip(".,!?;:")
+        if word and word[0].isupper() and len(word) > 2:
+            entities.append(word)
+    return entities
+
+
+@pytest.fixture(scope="module")
+def extract():
+    pytest.importorskip("neo4j")
+    pytest.importorskip("chromadb")
+    from backend.memory.memory_controller import MemoryController
+    
+    controller = MemoryController.__new__(MemoryController)
+    return controller._extract_entity_names
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I met O'Brien in Zürich.", ["O'Brien", "Zürich"]),
+    ("Jean-Luc and Émile use GPT-4!", ["Jean-Luc", "Émile", "GPT-4"]),
+    ("Alice works at ACME, Bob doesn't.", ["Alice", "ACME", "Bob"]),
+    ("we went to Paris; then Rome?", ["Paris", "Rome"]),
+    ("the Éiffel tower", ["Éiffel"]),
+    ("just lowercase text", []),
+    ("Al is OK", []),
+])
+def test_extract_entity_names(extract, text, expected):
+    assert extract(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "I met O'Brien in Zürich.",
+    "Jean-Luc and Émile use GPT-4!",
+    "My name is Ada, I live in Lisbon: Portugal.",
+    "Seen: iPhone, McDonald's, Über, SQL",
+])
+def test_matches_baseline_for_whitespace_separated_words(extract, text):
+    assert extract(text) == baseline_entity_names(text)
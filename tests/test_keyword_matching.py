@@ -0,0 +1,135 @@
+"""
+Tests that the Aho-Corasick keyword scans in LLMEngine.select_model and
+MemoryController._extract_facts match the original substring checks.
+"""
+
+import asyncio
+
+import pytest
+
+
+# Baseline keyword lists and checks, as they were before the automatons
+BASELINE_COMPLEX_KEYWORDS = [
+    "analyze", "compare", "evaluate", "explain in detail",
+    "comprehensive", "in-depth", "philosophical", "implications",
+    "reasoning", "technical details", "algorithm", "architecture"
+]
+BASELINE_PREFERENCE_KEYWORDS = ["like", "prefer", "love", "hate", "dislike", "enjoy"]
+BASELINE_FACTUAL_KEYWORDS = ["i am", "my name is", "i work", "i live"]
+
+
+def baseline_has_complex(prompt):
+    prompt_lower = prompt.lower()
+    return any(kw in prompt_lower for kw in BASELINE_COMPLEX_KEYWORDS)
+
+
+def baseline_categories(user_message):
+    user_lower = user_message.lower()
+    categories = []
+    if any(kw in user_lower for kw in BASELINE_PREFERENCE_KEYWORDS):
+        categories.append("preference")
+    if any(kw in user_lower for kw in BASELINE_FACTUAL_KEYWORDS):
+        categories.append("knowledge")
+    return categories or ["context"]
+
+
+PROMPTS = [
+    "",
+    "hi there",
+    "Can you ANALYZE this?",
+    "Please Explain In Detail how it works",
+    "explain   in detail",              # extra spaces break the phrase
+    "an in-depth look",
+    "indepth",
+    "reanalyzed the data",              # substring, not word match
+    "the algorithms compared",
+    "ALGORITHM",
+    "Architectural drawing",
+    "technical detail",                 # singular is not a keyword
+    "what are the implications?",
+    "comparison",                       # shares a prefix with "compare" only
+    "Évaluate",                         # accented first letter
+    "evaluate\nreasoning",
+    "İmplications",                     # lower() expands İ to i + combining dot
+]
+
+MESSAGES = [
+    "",
+    "ok",
+    "I like tea",
+    "I LIKE TEA",
+    "unlikely",                         # substring of "like"
+    "I'm not a fan of this",
+    "i am tired",
+    "I AM tired and I love it",
+    "My Name Is Ada",
+    "my  name is Ada",                  # double space breaks the phrase
+    "I worked at the lab",
+    "I live in Lisbon",
+    "Alive",                            # "i live" needs the space
+    "Chocolate",                        # contains "hate"
+    "I dislike rain",
+    "I enjoy it, and my name is Bo",
+    "İ am here",
+]
+
+
+@pytest.fixture(scope="module")
+def llm_engine_cls():
+    pytest.importorskip("llama_cpp")
+    from backend.core.llm_engine import LLMEngine
+    return LLMEngine
+
+
+@pytest.fixture(scope="module")
+def memory_controller_cls():
+    pytest.importorskip("neo4j")
+    pytest.importorskip("chromadb")
+    from backend.memory.memory_controller import MemoryController
+    return MemoryController
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_complex_keywords_match_baseline(llm_engine_cls, prompt):
+    from backend.core.llm_engine import COMPLEX_KEYWORDS
+    
+    assert list(COMPLEX_KEYWORDS) == BASELINE_COMPLEX_KEYWORDS
+    
+    # select_model needs no loaded models; skip __init__ but keep __del__ happy
+    engine = llm_engine_cls.__new__(llm_engine_cls)
+    engine._executors = {}
+    engine.models = {}
+    expected = "mistral" if baseline_has_complex(prompt) else "phi3"
+    
+    assert engine.select_model(prompt, {}) == expected
+
+
+def _categories(controller_cls, message):
+    controller = controller_cls.__new__(controller_cls)
+    facts = asyncio.run(controller._extract_facts(message, ""))
+    return [fact["category"] for fact in facts]
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_fact_keywords_match_baseline(memory_controller_cls, message):
+    assert _categories(memory_controller_cls, message) == baseline_categories(message)
+
+
+def test_fact_patterns_keep_baseline_keywords(memory_controller_cls):
+    from backend.memory.memory_controller import FACT_PATTERNS
+    
+    patterns = {category: (confidence, list(keywords)) for category, confidence, keywords in FACT_PATTERNS}
+    
+    assert [category for category, _, _ in FACT_PATTERNS] == ["preference", "knowledge"]
+    assert patterns["preference"] == (0.8, BASELINE_PREFERENCE_KEYWORDS)
+    assert patterns["knowledge"] == (0.9, BASELINE_FACTUAL_KEYWORDS)
+
+
+@pytest.mark.parametrize("message, category", [
+    ("my name iſ Ada", "knowledge"),    # long s folds to "s"
+    ("I DISLIKE RAIN", "preference"),
+])
+def test_fact_keywords_are_casefolded(memory_controller_cls, message, category):
+    # casefold() folds everything lower() does plus characters such as
+    # the long s, which the original lower() check missed
+    assert category in _categories(memory_controller_cls, message)
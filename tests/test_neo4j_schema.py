@@ -0,0 +1,62 @@
+"""
+Tests for schema script parsing in backend.memory.neo4j_schema.
+"""
+
+from backend.memory.neo4j_schema import (
+    NEO4J_SCHEMA_INIT,
+    _DATA_STATEMENTS,
+    _DDL_STATEMENTS,
+    _SCHEMA_STATEMENTS,
+    _split_statements,
+)
+
+
+def _baseline_statements(script):
+    """The original parser: split on every ';', drop comment-led chunks."""
+    statements = [
+        stmt.strip()
+        for stmt in script.split(';')
+        if stmt.strip() and not stmt.strip().startswith('--')
+    ]
+    return [stmt for stmt in statements if '-- =' not in stmt]
+
+
+def test_schema_statements_match_original_parser():
+    expected = _baseline_statements(NEO4J_SCHEMA_INIT)
+    
+    assert len(expected) == 13
+    assert list(_SCHEMA_STATEMENTS) == expected
+
+
+def test_schema_statements_partition_into_ddl_and_data():
+    assert len(_DDL_STATEMENTS) == 11
+    assert len(_DATA_STATEMENTS) == 2
+    assert sorted(i for i, _ in _DDL_STATEMENTS + _DATA_STATEMENTS) == list(range(1, 14))
+
+
+def test_semicolon_inside_string_does_not_split():
+    script = "RETURN 'a;b';\nRETURN \"c;d\";"
+    
+    assert _split_statements(script) == ["RETURN 'a;b'", "\nRETURN \"c;d\"", ""]
+
+
+def test_escaped_quote_inside_string():
+    script = "RETURN 'it\\'s; fine';RETURN 1"
+    
+    assert _split_statements(script) == ["RETURN 'it\\'s; fine'", "RETURN 1"]
+
+
+def test_apostrophe_in_comment_line_is_ignored():
+    script = "-- don't track this\nCREATE INDEX a;\n  -- nor this; or that\nCREATE INDEX b;"
+    
+    assert _split_statements(script) == [
+        "-- don't track this\nCREATE INDEX a",
+        "\n  -- nor this; or that\nCREATE INDEX b",
+        "",
+    ]
+
+
+def test_double_dash_inside_pattern_is_not_a_comment():
+    script = "MATCH (a)--(b) RETURN 'x;y';RETURN 2"
+    
+    assert _split_statements(script) == ["MATCH (a)--(b) RETURN 'x;y'", "RETURN 2"]
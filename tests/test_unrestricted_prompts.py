@@ -0,0 +1,46 @@
+"""
+Tests for rule normalization in backend.core.unrestricted_prompts.
+"""
+
+from backend.core.unrestricted_prompts import (
+    NormalizedRule,
+    _as_normalized,
+    normalize_rules,
+    prepare_rules_for_prompt,
+)
+
+
+RAW_RULES = [
+    {"rule": "Never share my address", "priority": "critical", "context": "all"},
+    {"rule": "Keep answers short", "priority": "low", "context": "work"},
+]
+
+
+def test_normalized_tuple_is_returned_unchanged():
+    rules = normalize_rules(RAW_RULES)
+    
+    assert _as_normalized(rules) is rules
+
+
+def test_normalized_list_is_accepted():
+    rules = normalize_rules(RAW_RULES)
+    
+    result = _as_normalized(list(rules))
+    
+    assert result == rules
+    assert isinstance(result, tuple)
+    assert all(isinstance(rule, NormalizedRule) for rule in result)
+
+
+def test_raw_dicts_and_normalized_rules_format_identically():
+    rules = normalize_rules(RAW_RULES)
+    
+    expected = prepare_rules_for_prompt(RAW_RULES)
+    
+    assert prepare_rules_for_prompt(rules) == expected
+    assert prepare_rules_for_prompt(list(rules)) == expected
+
+
+def test_empty_rules():
+    assert _as_normalized(None) == ()
+    assert _as_normalized([]) == ()